@@ -0,0 +1,3 @@
+from . import startup
+
+startup.install()  # import timing; a no-op unless STARTUP_PROFILE=1
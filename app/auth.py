@@ -1,13 +1,17 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .cache import TTLCache
 from .models import User, RoleEnum
 from .database import get_db
 
@@ -15,55 +19,136 @@ from .database import get_db
 SECRET_KEY = "replace-with-real-secret"
 ALGORITHM = "HS256"
 TOKEN_LIFETIME_MIN = 60
+# bcrypt runs here instead of on the event loop; 0 = hash inline (blocking)
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))      # seconds
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))  # 0 disables
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
+_hash_pool: ThreadPoolExecutor | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Identity:
+    """What request handlers need to know about the caller."""
+
+    id: int
+    username: str
+    role: RoleEnum
+
+
+# user id -> Identity, so authenticated requests skip the `users` lookup
+_user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+def invalidate_user(uid: int) -> None:
+    """Drop a cached identity; call after changing a user's role or deleting it."""
+    _user_cache.pop(uid)
+
+
+# ORM-level role changes / deletions invalidate automatically.  Other workers
+# (and bulk Core UPDATE/DELETE statements) catch up within USER_CACHE_TTL.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target: User) -> None:
+    invalidate_user(target.id)
 
 
 # -- Helpers --
+# passlib and python-jose (with its cryptography backend) are imported on
+# first use rather than at worker boot: they are the bulk of app.auth's
+# import time and nothing needs them until the first login / token.
+@functools.cache
+def _pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+@functools.cache
+def _jose():
+    from jose import JWTError, jwt
+
+    return jwt, JWTError
+
+
 def hash_pwd(pwd: str) -> str:
-    return pwd_context.hash(pwd)
+    return _pwd_context().hash(pwd)
 
 
 def verify_pwd(pwd: str, hashed: str) -> bool:
-    return pwd_context.verify(pwd, hashed)
+    return _pwd_context().verify(pwd, hashed)
+
+
+async def _offload(fn, *args):
+    """
+    Runs a bcrypt call on the bounded hashing pool.  bcrypt releases the GIL,
+    so up to HASH_WORKERS hashes proceed in parallel while the loop keeps
+    serving other requests.
+    """
+    global _hash_pool
+    if HASH_WORKERS <= 0:
+        return fn(*args)
+    if _hash_pool is None:
+        _hash_pool = ThreadPoolExecutor(HASH_WORKERS, thread_name_prefix="pwd-hash")
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, fn, *args)
+
+
+async def hash_pwd_async(pwd: str) -> str:
+    return await _offload(hash_pwd, pwd)
+
+
+async def verify_pwd_async(pwd: str, hashed: str) -> bool:
+    return await _offload(verify_pwd, pwd, hashed)
 
 
 async def authenticate(db: AsyncSession, username: str, password: str):
     user = await db.scalar(select(User).where(User.username == username))
-    if not user or not verify_pwd(password, user.password_hash):
+    if not user:
+        return None
+    # hand the connection back to the pool before spending ~250 ms in bcrypt
+    await db.close()
+    if not await verify_pwd_async(password, user.password_hash):
         return None
+    _user_cache.set(user.id, Identity(user.id, user.username, user.role))
     return user
 
 
 def create_token(payload: dict) -> str:
     to_encode = payload.copy()
     to_encode["exp"] = datetime.now(timezone.utc) + timedelta(minutes=TOKEN_LIFETIME_MIN)
+    jwt, _ = _jose()
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
 async def current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
+) -> Identity:
     cred_exc = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    jwt, JWTError = _jose()
     try:
         data = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         uid: int = int(data.get("sub", 0))
     except (JWTError, ValueError):
         raise cred_exc
-    user = await db.get(User, uid)
-    if not user:
-        raise cred_exc
-    return user
+
+    ident = _user_cache.get(uid)
+    if ident is None:
+        user = await db.get(User, uid)
+        if not user:
+            raise cred_exc
+        ident = Identity(user.id, user.username, user.role)
+        _user_cache.set(uid, ident)
+    return ident
 
 
 def role_guard(role: RoleEnum):
-    async def _guard(user: Annotated[User, Depends(current_user)]):
+    async def _guard(user: Annotated[Identity, Depends(current_user)]):
         if user.role != role:
             raise HTTPException(status_code=403, detail="Forbidden")
         return user
@@ -1,12 +1,16 @@
 # app/database.py
 import os
+import time
 from contextlib import asynccontextmanager
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
     AsyncSession,
 )
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 # --------------------------------------------------------------------------- #
 DATABASE_URL = os.getenv(
@@ -14,10 +18,103 @@ DATABASE_URL = os.getenv(
     "sqlite+aiosqlite:///./invoice.db",
 )
 
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+# ---------- engine tuning (env driven) -------------------------------------- #
+# Pool – applies to PostgreSQL and file-backed SQLite
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))      # seconds
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))        # seconds, -1 = off
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "0") == "1"
+DB_ECHO = os.getenv("DB_ECHO", "0") == "1"
+# asyncpg: prepared statements cached per connection (0 behind pgbouncer)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+# SQLite pragmas, applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also records how long callers waited for a connection."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - t0
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+
+def engine_options(url: str) -> dict:
+    """Keyword arguments for `create_async_engine`, derived from the env."""
+    u = make_url(url)
+    opts: dict = {"echo": DB_ECHO, "future": True}
+    if u.get_backend_name() == "sqlite" and u.database in (None, "", ":memory:"):
+        return opts  # in-memory SQLite keeps its single static connection
+
+    opts.update(
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    if u.get_driver_name() == "asyncpg":
+        opts["connect_args"] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    return opts
+
+
+def _sqlite_pragmas(dbapi_conn, _record) -> None:
+    cur = dbapi_conn.cursor()
+    cur.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cur.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cur.close()
+
+
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+if engine.dialect.name == "sqlite":
+    event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
 
+def pool_stats() -> dict:
+    """Snapshot of the connection pool for the metrics endpoints."""
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, TimedQueuePool):
+        stats.update(
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            wait_seconds_total=round(pool.wait_total, 6),
+            wait_seconds_max=round(pool.wait_max, 6),
+        )
+    return stats
+
+
 class Base(DeclarativeBase):
     """Shared metadata base for ORM models."""
     pass
@@ -26,11 +123,13 @@ class Base(DeclarativeBase):
 # ---------- FastAPI dependency --------------------------------------------- #
 async def get_db() -> AsyncSession:
     """
-    Yields an AsyncSession and guarantees closure after request.
+    Yields the request's AsyncSession, closed when the request is done.
     Use as `Depends(get_db)` inside routes/services.
+
+    FastAPI resolves a dependency once per request, so the route and
+    `current_user` share this one session.  The session checks out a
+    connection on its first statement only, so requests rejected from the
+    token alone never touch the pool.
     """
     async with SessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+        yield session
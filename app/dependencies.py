@@ -1,22 +1,158 @@
-from collections import defaultdict
-from datetime import datetime, timedelta, timezone
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Protocol
 
-from fastapi import Request, HTTPException, status
+from fastapi import Depends, Request, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
 
-# Very simple IP rate‑limiter for /login
-WINDOW = timedelta(minutes=1)
-MAX_ATTEMPTS = 5
-_buckets: dict[str, list[datetime]] = defaultdict(list)
+# Rate‑limiter for /login, keyed on client IP + username so that users behind
+# one NAT or proxy don't share a budget: sliding‑window counter, i.e. the
+# current and the previous fixed window per key, with the previous one
+# weighted by how much of it still overlaps the sliding window.  Constant
+# state per key.
+#
+# The weighting assumes the previous window's attempts were spread evenly; it
+# is rounded up so attempts just before a window boundary are never
+# under-counted, but a burst at the very end of one window can still admit up
+# to ~2× the limit across the boundary.
+WINDOW_SECONDS = float(os.getenv("LOGIN_RATE_WINDOW", "60"))
+MAX_ATTEMPTS = int(os.getenv("LOGIN_RATE_LIMIT", "5"))  # 0 disables the limiter
+BACKEND = os.getenv("LOGIN_RATE_LIMIT_BACKEND", "memory")  # memory | sqlite
+SQLITE_PATH = os.getenv(
+    "LOGIN_RATE_LIMIT_DB", os.path.join(tempfile.gettempdir(), "invoice-ratelimit.db")
+)
 
 
-def rate_limit_login(request: Request):
-    ip = request.client.host
-    now = datetime.now(timezone.utc)
-    _buckets[ip] = [t for t in _buckets[ip] if now - t < WINDOW]
+class RateLimitBackend(Protocol):
+    def hit(self, key: str, now: float) -> bool:
+        """Records an attempt for `key`; returns False if it is over the limit."""
 
-    if len(_buckets[ip]) >= MAX_ATTEMPTS:
+
+def _allowed(win: int, prev: int, curr: int, now: float, window: float, limit: int) -> bool:
+    elapsed = now / window - win  # fraction of the current window gone by
+    return math.ceil(prev * (1 - elapsed)) + curr < limit
+
+
+class MemoryBackend:
+    """Per-process counters; idle keys are evicted once per window."""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._state: dict[str, tuple[int, int, int]] = {}  # key -> (win, prev, curr)
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def hit(self, key: str, now: float) -> bool:
+        win = int(now // self.window)
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(win)
+                self._next_sweep = (win + 1) * self.window
+
+            w, prev, curr = self._state.get(key, (win, 0, 0))
+            if w != win:
+                prev, curr = (curr if w == win - 1 else 0), 0
+            if not _allowed(win, prev, curr, now, self.window, self.limit):
+                self._state[key] = (win, prev, curr)
+                return False
+            self._state[key] = (win, prev, curr + 1)
+            return True
+
+    def _sweep(self, win: int) -> None:
+        # a key last seen before the previous window carries no weight any more
+        stale = [k for k, (w, _, _) in self._state.items() if w < win - 1]
+        for k in stale:
+            del self._state[k]
+
+
+class SQLiteBackend:
+    """
+    Counters in a SQLite file shared by every worker on the host (put it on
+    /dev/shm for a memory-backed file).  One IMMEDIATE transaction per hit.
+    """
+
+    def __init__(self, limit: int, window: float, path: str):
+        self.limit = limit
+        self.window = window
+        self.path = path
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS login_attempts ("
+                " key TEXT PRIMARY KEY, win INTEGER NOT NULL,"
+                " prev INTEGER NOT NULL, curr INTEGER NOT NULL)"
+            )
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM login_attempts").fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, now: float) -> bool:
+        win = int(now // self.window)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if now >= self._next_sweep:
+                conn.execute("DELETE FROM login_attempts WHERE win < ?", (win - 1,))
+                self._next_sweep = (win + 1) * self.window
+
+            row = conn.execute(
+                "SELECT win, prev, curr FROM login_attempts WHERE key = ?", (key,)
+            ).fetchone()
+            w, prev, curr = row or (win, 0, 0)
+            if w != win:
+                prev, curr = (curr if w == win - 1 else 0), 0
+            ok = _allowed(win, prev, curr, now, self.window, self.limit)
+            conn.execute(
+                "INSERT INTO login_attempts (key, win, prev, curr) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET"
+                " win = excluded.win, prev = excluded.prev, curr = excluded.curr",
+                (key, win, prev, curr + ok),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return ok
+
+
+def make_backend(name: str = BACKEND) -> RateLimitBackend:
+    if name == "sqlite":
+        return SQLiteBackend(MAX_ATTEMPTS, WINDOW_SECONDS, SQLITE_PATH)
+    if name == "memory":
+        return MemoryBackend(MAX_ATTEMPTS, WINDOW_SECONDS)
+    raise ValueError(f"unknown LOGIN_RATE_LIMIT_BACKEND {name!r}")
+
+
+_limiter: RateLimitBackend | None = None
+_clock = time.time
+
+
+def rate_limit_login(request: Request, form: OAuth2PasswordRequestForm = Depends()):
+    global _limiter
+    if MAX_ATTEMPTS <= 0:
+        return
+    if _limiter is None:
+        _limiter = make_backend()
+    if not _limiter.hit(f"{request.client.host} {form.username}", _clock()):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Too many login attempts",
         )
-    _buckets[ip].append(now)
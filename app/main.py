@@ -2,22 +2,33 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import engine, Base
+from . import metrics, migrations, startup
+from .database import SessionLocal, engine
 from .routers import auth as auth_router
 from .routers import invoices as invoices_router
 from .routers import reports as reports_router
+from .routers import metrics as metrics_router
+from .services import ingest_jobs
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # -- Startup --
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # -- Startup --  (schema changes are `python -m scripts.migrate`'s job)
+    with startup.phase("migrations.check"):
+        await migrations.check(engine)
+    with startup.phase("ingest_jobs.fail_stale"):
+        async with SessionLocal() as db:
+            await ingest_jobs.fail_stale(db)
+    startup.report()
     yield
     # -- Shutdown --
+    await ingest_jobs.shutdown()
     await engine.dispose()
 
 app = FastAPI(title="Invoice Reimbursement System", lifespan=lifespan)
 
+metrics.install(engine)
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -28,3 +39,4 @@ app.add_middleware(
 app.include_router(auth_router.router)
 app.include_router(invoices_router.router)
 app.include_router(reports_router.router)
+app.include_router(metrics_router.router)
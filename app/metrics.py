@@ -0,0 +1,205 @@
+"""
+In-process request / DB / ingest metrics, rendered in the Prometheus text
+format by `GET /metrics`.
+
+* `MetricsMiddleware` times every HTTP request per route template and, with
+  SERVER_TIMING=1, reports the request's DB time and query count in a
+  `Server-Timing` response header.
+* `install(engine)` hooks SQLAlchemy cursor events so each statement is
+  attributed to the request that issued it (via a context variable) – a
+  route whose queries-per-request grows with the payload is an N+1.
+* `observe_ingest()` is fed by the CSV parser with rows validated and the
+  time spent validating them.
+
+Counters are per worker process; scrape every worker or aggregate upstream.
+"""
+
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+@dataclass
+class _RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+_current: ContextVar[_RequestStats | None] = ContextVar("request_stats", default=None)
+
+# (method, route) -> metric
+_latency: dict[tuple[str, str], Histogram] = {}
+_queries: dict[tuple[str, str], Histogram] = {}
+_db_seconds: dict[tuple[str, str], float] = {}
+_responses: dict[tuple[str, str, int], int] = {}
+_ingest = {"rows": 0, "seconds": 0.0}
+
+
+def observe_ingest(rows: int, seconds: float) -> None:
+    _ingest["rows"] += rows
+    _ingest["seconds"] += seconds
+
+
+def _record(method: str, route: str, status: int, seconds: float, stats: _RequestStats) -> None:
+    key = (method, route)
+    if key not in _latency:
+        _latency[key] = Histogram(LATENCY_BUCKETS)
+        _queries[key] = Histogram(QUERY_BUCKETS)
+        _db_seconds[key] = 0.0
+    _latency[key].observe(seconds)
+    _queries[key].observe(stats.queries)
+    _db_seconds[key] += stats.db_seconds
+    _responses[(method, route, status)] = _responses.get((method, route, status), 0) + 1
+
+
+# ---------- SQLAlchemy hooks -------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, params, context, executemany):
+    context._metrics_t0 = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, params, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - context._metrics_t0
+
+
+def install(engine) -> None:
+    """Attributes statements run on `engine` to the current request."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------- ASGI middleware --------------------------------------------------
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = _RequestStats()
+        token = _current.set(stats)
+        t0 = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    total_ms = (time.perf_counter() - t0) * 1000
+                    value = (
+                        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", '
+                        f"app;dur={total_ms:.1f}"
+                    )
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", value.encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            _record(
+                scope["method"],
+                getattr(route, "path", "<unmatched>"),
+                status,
+                time.perf_counter() - t0,
+                stats,
+            )
+            _current.reset(token)
+
+
+# ---------- exposition -------------------------------------------------------
+def _labels(**kw) -> str:
+    def esc(v) -> str:
+        return str(v).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in kw.items()) + "}"
+
+
+def _histogram(lines: list[str], name: str, series: dict, help_: str) -> None:
+    lines += [f"# HELP {name} {help_}", f"# TYPE {name} histogram"]
+    for (method, route), h in sorted(series.items()):
+        running = 0
+        for le, n in zip(h.buckets, h.counts):
+            running += n
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=le)} {running}")
+        lines.append(f"{name}_bucket{_labels(method=method, route=route, le='+Inf')} {h.count}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {h.sum}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {h.count}")
+
+
+_POOL_SERIES = {
+    "size": ("db_pool_size", "gauge"),
+    "checked_out": ("db_pool_checked_out", "gauge"),
+    "overflow": ("db_pool_overflow", "gauge"),
+    "checkouts": ("db_pool_checkouts_total", "counter"),
+    "timeouts": ("db_pool_timeouts_total", "counter"),
+    "wait_seconds_total": ("db_pool_wait_seconds_total", "counter"),
+    "wait_seconds_max": ("db_pool_wait_seconds_max", "gauge"),
+}
+
+
+def render(pool: dict) -> str:
+    lines: list[str] = []
+    _histogram(lines, "http_request_duration_seconds", _latency,
+               "Request latency by route template.")
+    _histogram(lines, "http_request_queries", _queries,
+               "SQL statements executed per request.")
+
+    lines += ["# HELP http_request_db_seconds_total Time spent in SQL per route; "
+              "divide by http_request_duration_seconds_sum for the DB share.",
+              "# TYPE http_request_db_seconds_total counter"]
+    for (method, route), v in sorted(_db_seconds.items()):
+        lines.append(f"http_request_db_seconds_total{_labels(method=method, route=route)} {v}")
+
+    lines += ["# HELP http_responses_total Responses by route and status code.",
+              "# TYPE http_responses_total counter"]
+    for (method, route, status), n in sorted(_responses.items()):
+        lines.append(
+            f"http_responses_total{_labels(method=method, route=route, status=status)} {n}"
+        )
+
+    lines += ["# HELP invoice_ingest_rows_total CSV rows validated.",
+              "# TYPE invoice_ingest_rows_total counter",
+              f"invoice_ingest_rows_total {_ingest['rows']}",
+              "# HELP invoice_ingest_seconds_total Time spent validating CSV rows "
+              "(rows/sec = rows_total / seconds_total).",
+              "# TYPE invoice_ingest_seconds_total counter",
+              f"invoice_ingest_seconds_total {_ingest['seconds']}"]
+
+    for key, (name, kind) in _POOL_SERIES.items():
+        if key in pool:
+            lines += [f"# TYPE {name} {kind}", f"{name} {pool[key]}"]
+    return "\n".join(lines) + "\n"
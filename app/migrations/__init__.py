@@ -0,0 +1,215 @@
+"""
+Versioned schema migrations.
+
+Every `vNNNN_<name>.py` module in this package is one schema version.  It
+defines `DESCRIPTION` and `steps(dialect) -> list[Step]`, rendered from table
+definitions frozen inside the module – never from `app.models` – so a
+version means the same SQL forever and can be printed without a database
+(`python -m scripts.migrate --sql postgresql`).
+
+Applied versions are recorded in `schema_version`.  `upgrade()` belongs to
+the migrate command; worker startup only calls `check()`, a single SELECT,
+and HEAD comes from the file names – the migration modules themselves (and
+the dialects they render for) are only imported when SQL is needed.
+
+Each migration runs in one transaction, except steps marked
+`transactional=False` – `CREATE INDEX CONCURRENTLY` on PostgreSQL – which run
+in autocommit so index builds on big tables don't block writers.  SQLite's
+driver doesn't wrap DDL in the transaction, so SQLite steps are written to
+be re-runnable (IF [NOT] EXISTS).
+"""
+
+import functools
+import importlib
+import pkgutil
+from dataclasses import dataclass
+from types import ModuleType
+
+from sqlalchemy import Enum, Table, inspect
+from sqlalchemy.engine import Connection, Dialect
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+VERSION_TABLE = "schema_version"
+DIALECTS = ("sqlite", "postgresql")  # for offline rendering
+
+_CREATE_VERSION_TABLE = (
+    f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+    "version INTEGER PRIMARY KEY, description VARCHAR NOT NULL, "
+    "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+)
+
+
+@dataclass(frozen=True)
+class Step:
+    sql: str
+    transactional: bool = True
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    module: ModuleType
+
+    @property
+    def description(self) -> str:
+        return self.module.DESCRIPTION
+
+    def steps(self, dialect: Dialect) -> list[Step]:
+        return self.module.steps(dialect)
+
+
+# ---------- DDL helpers for migration modules ----------
+def _compile(element, dialect: Dialect) -> str:
+    return str(element.compile(dialect=dialect, compile_kwargs={"literal_binds": True})).strip()
+
+
+def create_table(table: Table, dialect: Dialect) -> list[Step]:
+    """CREATE TABLE plus its indexes and, on PostgreSQL, its enum types."""
+    steps = []
+    if dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql.named_types import CreateEnumType
+
+        for col in table.columns:
+            if isinstance(col.type, Enum):
+                # enum types are shared between tables; CREATE TYPE has no IF NOT EXISTS
+                steps.append(Step(
+                    f"DO $$ BEGIN {_compile(CreateEnumType(col.type), dialect)}; "
+                    "EXCEPTION WHEN duplicate_object THEN NULL; END $$"
+                ))
+    steps.append(Step(_compile(CreateTable(table, if_not_exists=True), dialect)))
+    steps += [
+        Step(_compile(CreateIndex(ix, if_not_exists=True), dialect))
+        for ix in sorted(table.indexes, key=lambda ix: ix.name)
+    ]
+    return steps
+
+
+def create_index(dialect: Dialect, name: str, table: str, *columns: str) -> Step:
+    """Index on an existing (possibly large) table: CONCURRENTLY on PostgreSQL."""
+    if dialect.name == "postgresql":
+        # a failed concurrent build leaves an INVALID index behind: drop it and re-run
+        return Step(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({', '.join(columns)})",
+            transactional=False,
+        )
+    return Step(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+
+def sql(dialect: Dialect, element) -> Step:
+    """A Core statement (e.g. INSERT ... SELECT) rendered for `dialect`."""
+    return Step(_compile(element, dialect))
+
+
+# ---------- runner ----------
+def _modules() -> dict[int, str]:
+    return {
+        int(info.name[1:5]): info.name
+        for info in pkgutil.iter_modules(__path__)
+        if info.name[:1] == "v" and info.name[1:5].isdigit()
+    }
+
+
+@functools.cache
+def load() -> list[Migration]:
+    return [
+        Migration(version, importlib.import_module(f"{__name__}.{name}"))
+        for version, name in sorted(_modules().items())
+    ]
+
+
+def _record(m: Migration) -> str:
+    desc = m.description.replace("'", "''")
+    return f"INSERT INTO {VERSION_TABLE} (version, description) VALUES ({m.version}, '{desc}')"
+
+
+def _current(conn: Connection) -> int:
+    return conn.exec_driver_sql(f"SELECT max(version) FROM {VERSION_TABLE}").scalar() or 0
+
+
+def _upgrade(conn: Connection, target: int) -> list[Migration]:
+    conn.exec_driver_sql(_CREATE_VERSION_TABLE)
+    conn.commit()
+    current = _current(conn)
+    insp = inspect(conn)
+    if current == 0 and insp.has_table("invoices"):
+        # created by `create_all` before migrations existed: the baseline, or
+        # already past 0004 if it was created after amounts moved to cents
+        cents = "amount_cents" in {c["name"] for c in insp.get_columns("invoices")}
+        current = 4 if cents else 1
+        for m in load()[:current]:
+            conn.exec_driver_sql(_record(m))
+        conn.commit()
+
+    done = []
+    for m in load():
+        if not current < m.version <= target:
+            continue
+        for step in m.steps(conn.dialect):
+            if step.transactional:
+                conn.exec_driver_sql(step.sql)
+                continue
+            conn.commit()
+            conn.execution_options(isolation_level="AUTOCOMMIT")
+            try:
+                conn.exec_driver_sql(step.sql)
+                # execution autobegins even in autocommit, and the isolation
+                # level can't change while that transaction is open
+                conn.commit()
+            finally:
+                if conn.in_transaction():
+                    conn.rollback()
+                conn.execution_options(isolation_level=conn.default_isolation_level)
+        conn.exec_driver_sql(_record(m))
+        conn.commit()
+        done.append(m)
+    return done
+
+
+async def upgrade(engine: AsyncEngine, target: int | None = None) -> list[Migration]:
+    """Applies pending migrations up to `target` (default: HEAD)."""
+    async with engine.connect() as conn:
+        return await conn.run_sync(_upgrade, HEAD if target is None else target)
+
+
+async def current(engine: AsyncEngine) -> int:
+    """Applied schema version; 0 for a database that was never migrated."""
+    async with engine.connect() as conn:
+        try:
+            return await conn.run_sync(_current)
+        except DBAPIError:
+            return 0
+
+
+async def check(engine: AsyncEngine) -> None:
+    """Refuses to serve from a database older than this build expects."""
+    version = await current(engine)
+    if version < HEAD:
+        raise RuntimeError(
+            f"database schema is at version {version}, this build needs {HEAD}: "
+            "run `python -m scripts.migrate`"
+        )
+
+
+def render_sql(dialect_name: str, start: int = 0, target: int | None = None) -> str:
+    """The migrations after `start` as a SQL script, for review or for DBAs."""
+    dialect = importlib.import_module(f"sqlalchemy.dialects.{dialect_name}").dialect()
+    target = HEAD if target is None else target
+    out = [f"-- {dialect_name} schema migrations {start} -> {target}", _CREATE_VERSION_TABLE + ";"]
+    for m in load():
+        if not start < m.version <= target:
+            continue
+        out += ["", f"-- {m.version:04d}: {m.description}"]
+        in_tx = False
+        for step in m.steps(dialect) + [Step(_record(m))]:
+            if step.transactional != in_tx:
+                out.append("BEGIN;" if step.transactional else "COMMIT;")
+                in_tx = step.transactional
+            out.append(step.sql + ";")
+        if in_tx:
+            out.append("COMMIT;")
+    return "\n".join(out) + "\n"
+
+
+HEAD = max(_modules())
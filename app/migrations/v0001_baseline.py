@@ -0,0 +1,55 @@
+"""Baseline: the users / invoices / invoice_history schema before migrations."""
+
+from sqlalchemy import (
+    CheckConstraint, Column, Date, DateTime, Enum, Float, ForeignKey, Integer,
+    MetaData, String, Table, Text, func,
+)
+
+from . import create_table
+
+DESCRIPTION = "baseline: users, invoices, invoice_history"
+
+meta = MetaData()
+
+users = Table(
+    "users", meta,
+    Column("id", Integer, primary_key=True),
+    Column("username", String, unique=True, nullable=False),
+    Column("password_hash", String, nullable=False),
+    Column("role", Enum("Employee", "Manager", name="roleenum"), nullable=False),
+)
+
+invoices = Table(
+    "invoices", meta,
+    Column("id", Integer, primary_key=True),
+    Column("invoice_number", String, unique=True, nullable=False),
+    Column("date", Date, nullable=False),
+    Column("amount", Float, nullable=False),
+    Column("description", Text),
+    Column(
+        "status", Enum("Pending", "Approved", "Rejected", name="statusenum"),
+        nullable=False,
+    ),
+    Column(
+        "uploaded_by", Integer,
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False,
+    ),
+    Column("manager_comment", Text),
+    CheckConstraint("amount > 0", name="ck_amount_positive"),
+)
+
+invoice_history = Table(
+    "invoice_history", meta,
+    Column("id", Integer, primary_key=True),
+    Column("ts", DateTime, nullable=False, server_default=func.now()),
+    Column("action", Enum("Approved", "Rejected", name="actionenum"), nullable=False),
+    Column("actor_id", Integer),
+    Column(
+        "invoice_id", Integer,
+        ForeignKey("invoices.id", ondelete="CASCADE"), nullable=False,
+    ),
+)
+
+
+def steps(dialect):
+    return [s for t in (users, invoices, invoice_history) for s in create_table(t, dialect)]
@@ -0,0 +1,16 @@
+"""Indexes for keyset pagination, date filters and per-invoice history."""
+
+from . import create_index
+
+DESCRIPTION = "indexes on invoices (status, uploaded_by, date) and invoice_history"
+
+
+def steps(dialect):
+    return [
+        create_index(dialect, "ix_invoices_status_id", "invoices", "status", "id"),
+        create_index(dialect, "ix_invoices_uploaded_by_id", "invoices", "uploaded_by", "id"),
+        create_index(dialect, "ix_invoices_date", "invoices", "date"),
+        create_index(
+            dialect, "ix_invoice_history_invoice_id_ts", "invoice_history", "invoice_id", "ts"
+        ),
+    ]
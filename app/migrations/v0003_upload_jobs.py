@@ -0,0 +1,40 @@
+"""Background upload jobs."""
+
+from sqlalchemy import (
+    JSON, Column, DateTime, Enum, ForeignKey, Integer, MetaData, String, Table, Text,
+)
+
+from . import create_table
+
+DESCRIPTION = "upload_jobs"
+
+meta = MetaData()
+Table("users", meta, Column("id", Integer, primary_key=True))  # FK target only
+
+upload_jobs = Table(
+    "upload_jobs", meta,
+    Column("id", Integer, primary_key=True),
+    Column("filename", String),
+    Column(
+        "status",
+        Enum("Queued", "Running", "Completed", "Failed", name="jobstatusenum"),
+        nullable=False,
+    ),
+    Column(
+        "uploaded_by", Integer,
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False,
+    ),
+    Column("size_bytes", Integer, nullable=False),
+    Column("rows_processed", Integer, nullable=False),
+    Column("rows_inserted", Integer, nullable=False),
+    Column("rows_rejected", Integer, nullable=False),
+    Column("errors", JSON, nullable=False),
+    Column("detail", Text),
+    Column("created_at", DateTime, nullable=False),
+    Column("started_at", DateTime),
+    Column("finished_at", DateTime),
+)
+
+
+def steps(dialect):
+    return create_table(upload_jobs, dialect)
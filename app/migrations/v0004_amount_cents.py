@@ -0,0 +1,71 @@
+"""
+invoices.amount (FLOAT) -> invoices.amount_cents (BIGINT), rounded to the
+nearest cent.  PostgreSQL alters the table in place; SQLite can't drop a
+column used by a CHECK constraint, so the table is rebuilt and copied.
+"""
+
+from sqlalchemy import (
+    BigInteger, CheckConstraint, Column, Date, Enum, ForeignKey, Index, Integer,
+    MetaData, String, Table, Text,
+)
+
+from . import Step, create_table
+
+DESCRIPTION = "invoices.amount -> amount_cents"
+
+meta = MetaData()
+Table("users", meta, Column("id", Integer, primary_key=True))  # FK target only
+
+invoices = Table(
+    "invoices", meta,
+    Column("id", Integer, primary_key=True),
+    Column("invoice_number", String, unique=True, nullable=False),
+    Column("date", Date, nullable=False),
+    Column("amount_cents", BigInteger, nullable=False),
+    Column("description", Text),
+    Column(
+        "status", Enum("Pending", "Approved", "Rejected", name="statusenum"),
+        nullable=False,
+    ),
+    Column(
+        "uploaded_by", Integer,
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False,
+    ),
+    Column("manager_comment", Text),
+    CheckConstraint("amount_cents > 0", name="ck_amount_positive"),
+    Index("ix_invoices_status_id", "status", "id"),
+    Index("ix_invoices_uploaded_by_id", "uploaded_by", "id"),
+    Index("ix_invoices_date", "date"),
+)
+
+
+def _sqlite(dialect):
+    cols = [c.name for c in invoices.columns]
+    src = ["CAST(ROUND(amount * 100) AS INTEGER)" if c == "amount_cents" else c for c in cols]
+    return [
+        *(Step(f"DROP INDEX IF EXISTS {ix.name}") for ix in invoices.indexes),
+        # keeps invoice_history's foreign key pointing at "invoices"
+        Step("PRAGMA legacy_alter_table=ON"),
+        Step("ALTER TABLE invoices RENAME TO invoices_old"),
+        Step("PRAGMA legacy_alter_table=OFF"),
+        *create_table(invoices, dialect),
+        Step(
+            f"INSERT INTO invoices ({', '.join(cols)}) "
+            f"SELECT {', '.join(src)} FROM invoices_old"
+        ),
+        Step("DROP TABLE invoices_old"),
+    ]
+
+
+def _postgresql():
+    return [
+        Step("ALTER TABLE invoices ADD COLUMN amount_cents BIGINT"),
+        Step("UPDATE invoices SET amount_cents = ROUND(amount * 100)::bigint"),
+        Step("ALTER TABLE invoices ALTER COLUMN amount_cents SET NOT NULL"),
+        Step("ALTER TABLE invoices DROP COLUMN amount"),  # and ck_amount_positive
+        Step("ALTER TABLE invoices ADD CONSTRAINT ck_amount_positive CHECK (amount_cents > 0)"),
+    ]
+
+
+def steps(dialect):
+    return _sqlite(dialect) if dialect.name == "sqlite" else _postgresql()
@@ -0,0 +1,63 @@
+"""monthly_spend rollup and data_versions, backfilled from invoices."""
+
+from sqlalchemy import (
+    BigInteger, Column, Date, Enum, ForeignKey, Index, Integer, MetaData, String,
+    Table, extract, func, select,
+)
+
+from . import Step, create_table, sql
+
+DESCRIPTION = "monthly_spend rollup, data_versions"
+
+meta = MetaData()
+Table("users", meta, Column("id", Integer, primary_key=True))  # FK target only
+
+_status = Enum("Pending", "Approved", "Rejected", name="statusenum")
+
+invoices = Table(  # the columns the backfill reads
+    "invoices", meta,
+    Column("id", Integer, primary_key=True),
+    Column("date", Date),
+    Column("amount_cents", BigInteger),
+    Column("status", _status),
+    Column("uploaded_by", Integer),
+)
+
+monthly_spend = Table(
+    "monthly_spend", meta,
+    Column(
+        "uploaded_by", Integer,
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True,
+    ),
+    Column("year", Integer, primary_key=True),
+    Column("month", Integer, primary_key=True),
+    Column("status", _status, primary_key=True),
+    Column("count", Integer, nullable=False),
+    Column("total_cents", BigInteger, nullable=False),
+    Index("ix_monthly_spend_year_month", "year", "month"),
+)
+
+data_versions = Table(
+    "data_versions", meta,
+    Column("name", String, primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+
+def steps(dialect):
+    year = extract("year", invoices.c.date)
+    month = extract("month", invoices.c.date)
+    backfill = monthly_spend.insert().from_select(
+        ["uploaded_by", "year", "month", "status", "count", "total_cents"],
+        select(
+            invoices.c.uploaded_by, year, month, invoices.c.status,
+            func.count(), func.sum(invoices.c.amount_cents),
+        ).group_by(invoices.c.uploaded_by, year, month, invoices.c.status),
+    )
+    return [
+        # databases set up with create_all may hold an older (float) rollup
+        Step("DROP TABLE IF EXISTS monthly_spend"),
+        *create_table(monthly_spend, dialect),
+        *create_table(data_versions, dialect),
+        sql(dialect, backfill),
+    ]
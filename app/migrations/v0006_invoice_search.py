@@ -0,0 +1,62 @@
+"""
+Full-text search over invoice numbers and descriptions.
+
+SQLite: an external-content FTS5 table (`invoices_fts`, rowid = invoices.id)
+kept in sync by triggers, with prefix indexes for type-ahead and bm25
+weights that rank number hits above description hits.  `-` and `/` are
+token characters, so `INV-2024-001` is one token and a number prefix is one
+short range scan instead of an AND over `inv`, which every row contains.
+
+PostgreSQL: a GIN index over a weighted `tsvector` expression (the search
+service repeats the expression verbatim so the planner can use it) plus a
+trigram index on `invoice_number` for substring lookups.
+"""
+
+from . import Step
+
+DESCRIPTION = "full-text search on invoices (FTS5 / tsvector + trigram)"
+
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(invoice_number, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B')"
+)
+
+_SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS invoices_fts USING fts5("
+    "invoice_number, description, content='invoices', content_rowid='id', "
+    "tokenize=\"unicode61 remove_diacritics 2 tokenchars '-/'\", prefix='2 3 4')",
+    # only number and description feed the index: status changes don't touch it
+    "CREATE TRIGGER IF NOT EXISTS invoices_fts_ai AFTER INSERT ON invoices BEGIN "
+    "INSERT INTO invoices_fts (rowid, invoice_number, description) "
+    "VALUES (new.id, new.invoice_number, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS invoices_fts_ad AFTER DELETE ON invoices BEGIN "
+    "INSERT INTO invoices_fts (invoices_fts, rowid, invoice_number, description) "
+    "VALUES ('delete', old.id, old.invoice_number, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS invoices_fts_au "
+    "AFTER UPDATE OF invoice_number, description ON invoices BEGIN "
+    "INSERT INTO invoices_fts (invoices_fts, rowid, invoice_number, description) "
+    "VALUES ('delete', old.id, old.invoice_number, old.description); "
+    "INSERT INTO invoices_fts (rowid, invoice_number, description) "
+    "VALUES (new.id, new.invoice_number, new.description); END",
+    "INSERT INTO invoices_fts (invoices_fts) VALUES ('rebuild')",
+    "INSERT INTO invoices_fts (invoices_fts, rank) VALUES ('rank', 'bm25(4.0, 1.0)')",
+]
+
+
+def steps(dialect):
+    if dialect.name == "sqlite":
+        return [Step(s) for s in _SQLITE]
+    # pg_trgm ships with PostgreSQL but CREATE EXTENSION needs the right privileges
+    return [
+        Step("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+        Step(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_invoices_search "
+            f"ON invoices USING gin (({_PG_DOCUMENT}))",
+            transactional=False,
+        ),
+        Step(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_invoices_number_trgm "
+            "ON invoices USING gin (invoice_number gin_trgm_ops)",
+            transactional=False,
+        ),
+    ]
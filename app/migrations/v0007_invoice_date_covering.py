@@ -0,0 +1,20 @@
+"""Covering index for day-range spend reports; replaces ix_invoices_date."""
+
+from . import Step, create_index
+
+DESCRIPTION = "covering index on invoices (date, status, uploaded_by, amount_cents)"
+
+
+def steps(dialect):
+    concurrently = " CONCURRENTLY" if dialect.name == "postgresql" else ""
+    return [
+        create_index(
+            dialect, "ix_invoices_date_covering", "invoices",
+            "date", "status", "uploaded_by", "amount_cents",
+        ),
+        # still leads with date, so the listing's date filters use the new one
+        Step(
+            f"DROP INDEX{concurrently} IF EXISTS ix_invoices_date",
+            transactional=dialect.name != "postgresql",
+        ),
+    ]
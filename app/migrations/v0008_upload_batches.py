@@ -0,0 +1,47 @@
+"""Upload batches for idempotent / resumable uploads, and invoices.batch_id."""
+
+from sqlalchemy import (
+    Column, DateTime, Enum, ForeignKey, Index, Integer, MetaData, String, Table,
+)
+
+from . import Step, create_index, create_table
+
+DESCRIPTION = "upload_batches, invoices.batch_id"
+
+meta = MetaData()
+Table("users", meta, Column("id", Integer, primary_key=True))  # FK target only
+
+upload_batches = Table(
+    "upload_batches", meta,
+    Column("id", Integer, primary_key=True),
+    Column(
+        "uploaded_by", Integer,
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False,
+    ),
+    Column("content_hash", String(64), nullable=False),
+    Column("idempotency_key", String(255)),
+    Column("filename", String),
+    Column(
+        "status",
+        Enum("Queued", "Running", "Completed", "Failed", name="jobstatusenum"),
+        nullable=False,
+    ),
+    Column("rows_total", Integer, nullable=False),
+    Column("rows_committed", Integer, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("finished_at", DateTime),
+    Index("ix_upload_batches_user_hash", "uploaded_by", "content_hash", unique=True),
+    Index("ix_upload_batches_user_key", "uploaded_by", "idempotency_key", unique=True),
+)
+
+
+def steps(dialect):
+    return [
+        *create_table(upload_batches, dialect),
+        # nullable with no default: a metadata-only change on both dialects
+        Step(
+            "ALTER TABLE invoices ADD COLUMN batch_id INTEGER "
+            "REFERENCES upload_batches (id) ON DELETE SET NULL"
+        ),
+        create_index(dialect, "ix_invoices_batch_id", "invoices", "batch_id"),
+    ]
@@ -0,0 +1,15 @@
+"""upload_jobs.heartbeat_at, so jobs orphaned by a dead worker can be failed."""
+
+from sqlalchemy import DateTime
+
+from . import Step
+
+DESCRIPTION = "upload_jobs.heartbeat_at"
+
+
+def steps(dialect):
+    # nullable with no default: a metadata-only change on both dialects
+    return [Step(
+        "ALTER TABLE upload_jobs ADD COLUMN heartbeat_at "
+        f"{DateTime().compile(dialect=dialect)}"
+    )]
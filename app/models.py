@@ -6,15 +6,19 @@ from sqlalchemy import (
     Integer,
     String,
     Date,
-    Float,
+    BigInteger,
     Text,
+    DateTime,
+    JSON,
     ForeignKey,
     CheckConstraint,
+    Index,
     func,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
+from .money import from_cents
 
 
 # ---------- ENUMS ----------
@@ -34,6 +38,13 @@ class ActionEnum(str, enum.Enum):
     Rejected = "Rejected"
 
 
+class JobStatusEnum(str, enum.Enum):
+    Queued = "Queued"
+    Running = "Running"
+    Completed = "Completed"
+    Failed = "Failed"
+
+
 # ---------- MODELS ----------
 class User(Base):
     __tablename__ = "users"
@@ -49,13 +60,21 @@ class User(Base):
 class Invoice(Base):
     __tablename__ = "invoices"
     __table_args__ = (
-        CheckConstraint("amount > 0", name="ck_amount_positive"),
+        CheckConstraint("amount_cents > 0", name="ck_amount_positive"),
+        # keyset pagination: WHERE <filter> AND id > :cursor ORDER BY id
+        Index("ix_invoices_status_id", "status", "id"),
+        Index("ix_invoices_uploaded_by_id", "uploaded_by", "id"),
+        # date filters, and index-only range scans for /reports/spend
+        Index(
+            "ix_invoices_date_covering", "date", "status", "uploaded_by", "amount_cents"
+        ),
+        Index("ix_invoices_batch_id", "batch_id"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     invoice_number: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     date: Mapped[date] = mapped_column(Date, nullable=False)
-    amount: Mapped[float] = mapped_column(Float, nullable=False)
+    amount_cents: Mapped[int] = mapped_column(BigInteger, nullable=False)
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[StatusEnum] = mapped_column(
         Enum(StatusEnum), default=StatusEnum.Pending
@@ -64,13 +83,21 @@ class Invoice(Base):
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     manager_comment: Mapped[str | None] = mapped_column(Text)
+    batch_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("upload_batches.id", ondelete="SET NULL")
+    )
 
     uploader: Mapped["User"] = relationship(back_populates="invoices")
     history: Mapped[list["InvoiceHistory"]] = relationship(back_populates="invoice")
 
+    @property
+    def amount(self) -> float:
+        return from_cents(self.amount_cents)
+
 
 class InvoiceHistory(Base):
     __tablename__ = "invoice_history"
+    __table_args__ = (Index("ix_invoice_history_invoice_id_ts", "invoice_id", "ts"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     ts: Mapped[datetime] = mapped_column(
@@ -83,3 +110,95 @@ class InvoiceHistory(Base):
     )
 
     invoice: Mapped["Invoice"] = relationship(back_populates="history")
+
+
+class UploadJob(Base):
+    """Background CSV ingest started via `POST /invoices/upload-jobs`."""
+
+    __tablename__ = "upload_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    filename: Mapped[str | None] = mapped_column(String)
+    status: Mapped[JobStatusEnum] = mapped_column(
+        Enum(JobStatusEnum), default=JobStatusEnum.Queued, nullable=False
+    )
+    uploaded_by: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    size_bytes: Mapped[int] = mapped_column(Integer, default=0)
+    rows_processed: Mapped[int] = mapped_column(Integer, default=0)
+    rows_inserted: Mapped[int] = mapped_column(Integer, default=0)
+    rows_rejected: Mapped[int] = mapped_column(Integer, default=0)
+    errors: Mapped[list] = mapped_column(JSON, default=list)
+    detail: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    started_at: Mapped[datetime | None] = mapped_column(DateTime)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime)
+    # bumped with every committed chunk; see `ingest_jobs.fail_stale`
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+
+class UploadBatch(Base):
+    """
+    One file sent to `POST /invoices/upload`, keyed per uploader by content
+    hash and optional Idempotency-Key.  Its chunks commit together with
+    `rows_committed`, so a retry replays a completed batch's result or
+    resumes an interrupted one (see `services.upload_batches`).
+    """
+
+    __tablename__ = "upload_batches"
+    __table_args__ = (
+        Index("ix_upload_batches_user_hash", "uploaded_by", "content_hash", unique=True),
+        Index("ix_upload_batches_user_key", "uploaded_by", "idempotency_key", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    uploaded_by: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    idempotency_key: Mapped[str | None] = mapped_column(String(255))
+    filename: Mapped[str | None] = mapped_column(String)
+    status: Mapped[JobStatusEnum] = mapped_column(
+        Enum(JobStatusEnum), default=JobStatusEnum.Running, nullable=False
+    )
+    rows_total: Mapped[int] = mapped_column(Integer, nullable=False)
+    rows_committed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+
+class MonthlySpend(Base):
+    """
+    Rollup of invoices per employee × month × status, maintained incrementally
+    by `services.rollups` so `/reports/monthly` never scans `invoices`.
+    """
+
+    __tablename__ = "monthly_spend"
+    __table_args__ = (Index("ix_monthly_spend_year_month", "year", "month"),)
+
+    uploaded_by: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[StatusEnum] = mapped_column(Enum(StatusEnum), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_cents: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class DataVersion(Base):
+    """
+    Named change counters, bumped in the same transaction as the writes they
+    track (see `services.rollups`).  Readers compare versions instead of
+    re-running queries – e.g. the report ETags.
+    """
+
+    __tablename__ = "data_versions"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,46 @@
+"""
+Money is stored as integer cents (`amount_cents`, `total_cents`) so sums and
+comparisons are exact.  These are the only conversions in and out.
+"""
+
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal, Inexact, InvalidOperation, localcontext
+
+MAX_CENTS = 10**15  # 10 trillion – far below the BIGINT range
+_MAX_AMOUNT = Decimal(MAX_CENTS).scaleb(-2)
+
+
+def to_cents(raw: str | Decimal) -> int:
+    """Parses a positive amount with at most two decimal places."""
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        raise ValueError(f"amount {raw!r} is not a number") from None
+    if not value.is_finite() or value <= 0:
+        raise ValueError("amount must be greater than 0")
+    if value >= _MAX_AMOUNT:
+        raise ValueError(f"amount {raw!r} is too large")
+    # below MAX_CENTS, * 100 only rounds when there are too many decimals
+    with localcontext() as ctx:
+        ctx.traps[Inexact] = True
+        try:
+            cents = value * 100
+            exact = cents == cents.to_integral_value()
+        except Inexact:
+            exact = False
+    if not exact:
+        raise ValueError(f"amount {raw!r} has more than 2 decimal places")
+    return int(cents)
+
+
+def bound_cents(value: Decimal, upper: bool = False) -> int:
+    """
+    Cents bound for a range filter: `>= 10.005` is `>= 1001` cents.  Clamped
+    to the range amounts can have, so any bound fits the column.
+    """
+    value = min(max(value, Decimal(0)), _MAX_AMOUNT)
+    return int((value * 100).to_integral_value(ROUND_FLOOR if upper else ROUND_CEILING))
+
+
+def from_cents(cents: int) -> float:
+    # the nearest double to n/100 prints as exactly n/100 in JSON and CSV
+    return cents / 100
@@ -0,0 +1,22 @@
+"""
+JSON responses encoded straight to bytes by pydantic-core.
+
+For a `response_model` route FastAPI validates every returned object into
+the model, walks the result with `jsonable_encoder` and then `json.dumps`
+it – three passes per row, which dominates list endpoints returning
+thousands of rows.  Those endpoints instead select only the columns they
+emit, build dicts in the documented shape and return a `FastJSONResponse`:
+one pass in Rust, with dates, datetimes and enums encoded exactly as the
+default path does.  The `response_model` stays on the route for the
+OpenAPI schema; a returned Response is not re-validated.
+"""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
@@ -6,12 +6,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..auth import authenticate, create_token, hash_pwd, TOKEN_LIFETIME_MIN
+from ..dependencies import rate_limit_login
 from ..schemas import Token
 
 router = APIRouter(tags=["auth"])
 
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limit_login)])
 async def login(
     form: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db),
@@ -1,43 +1,278 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
 from typing import List, Annotated
 
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Header, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload 
+from sqlalchemy import select, insert, tuple_, update
 
+from .. import money
 from ..database import get_db
-from ..models import Invoice, StatusEnum, InvoiceHistory, ActionEnum
-from ..schemas import InvoiceOut
+from ..responses import FastJSONResponse
+from ..models import (
+    ActionEnum, Invoice, InvoiceHistory, JobStatusEnum, StatusEnum, UploadJob, User,
+)
+from ..schemas import (
+    BulkTransitionOut, BulkTransitionRequest, HistoryEvent, InvoiceHistoryEvent,
+    InvoiceOut, RowId, UploadJobOut,
+)
 from ..auth import current_employee, current_manager, current_user
-from ..services.csv_parser import stream_validate
+from ..services import export, ingest_jobs, rollups, search, upload_batches
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
+MAX_PAGE = 1000
+MAX_SEARCH_OFFSET = 10_000
+
 
 @router.post("/upload")
 async def upload(
+    response: Response,
     file: Annotated[UploadFile, File(..., description="CSV file")],
+    idempotency_key: Annotated[str | None, Header(max_length=255)] = None,
     employee=Depends(current_employee),
     db: AsyncSession = Depends(get_db),
 ):
-    inserted = 0
-    async for inv in stream_validate(file, db):
-        db.add(Invoice(**inv.model_dump(), uploaded_by=employee.id))
-        inserted += 1
+    """
+    Validates the whole file, then inserts it one chunk per transaction.
+    Sending the same file again (or the same `Idempotency-Key`) returns the
+    original `{"inserted", "batch_id"}` with `Idempotent-Replayed: true`, or
+    finishes an upload that was cut off part-way.  `GET /invoices?batch_id=`
+    lists what a batch inserted.
+    """
+    # loaded on first upload, not at worker boot
+    from ..services.csv_parser import check_size, stream_validate
+
+    check_size(file)
+    digest = await upload_batches.digest(file)
+    batch = await upload_batches.find(db, employee.id, digest, idempotency_key)
+    if batch is not None and batch.status is JobStatusEnum.Completed:
+        response.headers["Idempotent-Replayed"] = "true"
+        return upload_batches.result(batch)
+
+    # nothing is written unless the whole (remaining) file is valid
+    skip = batch.rows_committed if batch else 0
+    chunks = [chunk async for chunk in stream_validate(file, db, skip=skip)]
+    if batch is None:
+        batch = await upload_batches.create(
+            db, employee.id, digest, idempotency_key, file.filename,
+            sum(map(len, chunks)),
+        )
+    for chunk in chunks:
+        await upload_batches.advance(db, batch, len(chunk))
+        deltas = rollups.new_deltas()
+        for inv in chunk:
+            inv["uploaded_by"] = employee.id
+            inv["batch_id"] = batch.id
+            rollups.add(deltas, employee.id, inv["date"], StatusEnum.Pending, inv["amount_cents"])
+        await db.execute(insert(Invoice), chunk)
+        await rollups.apply(db, deltas)
+        await db.commit()
+    await db.commit()  # an empty file still records its batch
+    return upload_batches.result(batch)
+
+
+def _job_out(job: UploadJob) -> UploadJobOut:
+    out = UploadJobOut.model_validate(job)
+    if job.started_at:
+        elapsed = ((job.finished_at or datetime.utcnow()) - job.started_at).total_seconds()
+        out.rows_per_sec = round(job.rows_processed / elapsed, 1) if elapsed else None
+    return out
+
+
+@router.post("/upload-jobs", response_model=UploadJobOut, status_code=202)
+async def create_upload_job(
+    file: Annotated[UploadFile, File(..., description="CSV file")],
+    employee=Depends(current_employee),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Asynchronous variant of `/upload` for large files: the CSV is spooled to
+    disk and ingested in the background.  Poll `/upload-jobs/{id}` for progress.
+    """
+    path, size = await ingest_jobs.spool(file)
+    job = UploadJob(
+        filename=file.filename, uploaded_by=employee.id, size_bytes=size, errors=[]
+    )
+    db.add(job)
     await db.commit()
-    return {"inserted": inserted}
+    ingest_jobs.start(job.id, path)
+    return _job_out(job)
 
 
-@router.get("", response_model=List[InvoiceOut])
-async def list_invoices(user=Depends(current_user), db: AsyncSession = Depends(get_db)):
-    stmt = select(Invoice)
+@router.get("/upload-jobs/{job_id}", response_model=UploadJobOut)
+async def get_upload_job(
+    job_id: RowId, user=Depends(current_user), db: AsyncSession = Depends(get_db)
+):
+    job = await db.get(UploadJob, job_id)
+    if not job or (user.role.value == "Employee" and job.uploaded_by != user.id):
+        raise HTTPException(404, "Upload job not found")
+    if ingest_jobs.is_stale(job) and await ingest_jobs.fail_stale(db, job.id):
+        await db.refresh(job)
+    return _job_out(job)
+
+
+@dataclass
+class InvoiceFilters:
+    status: StatusEnum | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+    min_amount: Decimal | None = None
+    max_amount: Decimal | None = None
+    uploaded_by: RowId | None = None
+    batch_id: RowId | None = None
+
+
+def _scoped(stmt, user, f: InvoiceFilters):
+    """
+    Applies role scoping (employees only ever see their own invoices) and the
+    optional filters.  Shared by every endpoint that lists invoices.
+    """
     if user.role.value == "Employee":
         stmt = stmt.where(Invoice.uploaded_by == user.id)
-    res = await db.execute(stmt)
-    return res.scalars().all()
+    elif f.uploaded_by is not None:
+        stmt = stmt.where(Invoice.uploaded_by == f.uploaded_by)
+    if f.batch_id is not None:
+        stmt = stmt.where(Invoice.batch_id == f.batch_id)
+    if f.status is not None:
+        stmt = stmt.where(Invoice.status == f.status)
+    if f.date_from is not None:
+        stmt = stmt.where(Invoice.date >= f.date_from)
+    if f.date_to is not None:
+        stmt = stmt.where(Invoice.date <= f.date_to)
+    if f.min_amount is not None:
+        stmt = stmt.where(Invoice.amount_cents >= money.bound_cents(f.min_amount))
+    if f.max_amount is not None:
+        stmt = stmt.where(
+            Invoice.amount_cents <= money.bound_cents(f.max_amount, upper=True)
+        )
+    return stmt
+
+
+# InvoiceOut's fields, in its order, as plain columns
+_INVOICE_COLUMNS = (
+    Invoice.invoice_number, Invoice.date, Invoice.amount_cents, Invoice.description,
+    Invoice.id, Invoice.status, Invoice.manager_comment,
+)
+
+
+def _invoices_json(rows, limit: int, next_cursor) -> FastJSONResponse:
+    """
+    Renders InvoiceOut rows; when a `limit + 1`-th row was fetched it is
+    dropped and `next_cursor(rows)` becomes the `X-Next-Cursor` header.
+    """
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = str(next_cursor(rows))
+    return FastJSONResponse(
+        [
+            {
+                "invoice_number": number,
+                "date": day,
+                "amount": money.from_cents(cents),
+                "description": description,
+                "id": id_,
+                "status": status,
+                "manager_comment": comment,
+            }
+            for number, day, cents, description, id_, status, comment in rows
+        ],
+        headers=headers,
+    )
+
+
+@router.get("", response_model=List[InvoiceOut])
+async def list_invoices(
+    filters: Annotated[InvoiceFilters, Depends()],
+    limit: int = Query(100, ge=1, le=MAX_PAGE),
+    after: RowId | None = Query(None, description="cursor: last id of the previous page"),
+    user=Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Keyset-paginated listing ordered by id.  When more rows are available the
+    `X-Next-Cursor` header carries the value to pass as `after`.
+    """
+    stmt = _scoped(select(*_INVOICE_COLUMNS), user, filters)
+    if after is not None:
+        stmt = stmt.where(Invoice.id > after)
+    stmt = stmt.order_by(Invoice.id).limit(limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    return _invoices_json(rows, limit, lambda page: page[-1].id)
+
+
+@router.get("/search", response_model=List[InvoiceOut])
+async def search_invoices(
+    filters: Annotated[InvoiceFilters, Depends()],
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(50, ge=1, le=MAX_PAGE),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    user=Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Prefix search over invoice numbers and descriptions, best match first,
+    with the same scoping and filters as `GET /invoices`.  Results are ranked,
+    so pages are offset based: `X-Next-Cursor` carries the next `offset`.
+    """
+    stmt = _scoped(select(*_INVOICE_COLUMNS), user, filters)
+    stmt = search.apply(stmt, q, db.bind.dialect.name)
+    rows = (await db.execute(stmt.offset(offset).limit(limit + 1))).all()
+    return _invoices_json(rows, limit, lambda page: offset + limit)
+
+
+EXPORT_COLUMNS = (
+    "id", "invoice_number", "date", "amount", "description",
+    "status", "manager_comment", "uploaded_by",
+)
+_AMOUNT = EXPORT_COLUMNS.index("amount")
+
+
+def _export_row(r) -> tuple:
+    return (*r[:_AMOUNT], money.from_cents(r[_AMOUNT]), *r[_AMOUNT + 1:])
+
+
+@router.get("/export")
+async def export_invoices(
+    filters: Annotated[InvoiceFilters, Depends()],
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    user=Depends(current_user),
+):
+    """
+    Streams every invoice visible to the caller (same scoping and filters as
+    `GET /invoices`) as CSV or NDJSON, straight from a server-side cursor.
+    """
+    columns = (Invoice.amount_cents if c == "amount" else getattr(Invoice, c)
+               for c in EXPORT_COLUMNS)
+    stmt = _scoped(select(*columns), user, filters).order_by(Invoice.id)
+    return export.stream_rows(
+        stmt, EXPORT_COLUMNS, format, "invoices", transform=_export_row
+    )
 
 
 # --- helpers ---------------------------------------------------------------
+async def _record_transitions(
+    db: AsyncSession, rows, new_status: StatusEnum, actor_id: int
+) -> None:
+    """
+    History rows and rollup deltas for invoices just moved out of Pending.
+    `rows` need `id`, `uploaded_by`, `date` and `amount_cents`.
+    """
+    action = ActionEnum(new_status.value)
+    await db.execute(
+        insert(InvoiceHistory),
+        [{"action": action, "actor_id": actor_id, "invoice_id": r.id} for r in rows],
+    )
+    deltas = rollups.new_deltas()
+    for r in rows:
+        rollups.add(deltas, r.uploaded_by, r.date, StatusEnum.Pending, r.amount_cents, sign=-1)
+        rollups.add(deltas, r.uploaded_by, r.date, new_status, r.amount_cents)
+    await rollups.apply(db, deltas)
+
+
 async def _transition(
     invoice_id: int,
     new_status: StatusEnum,
@@ -45,29 +280,27 @@ async def _transition(
     manager,
     db: AsyncSession,
 ):
-    inv = await db.get(Invoice, invoice_id)
-    if not inv:
-        raise HTTPException(404, "Invoice not found")
-    if inv.status != StatusEnum.Pending:
-        raise HTTPException(409, "Already processed")
-
-    inv.status = new_status
-    inv.manager_comment = comment
-    db.add(
-        InvoiceHistory(
-            action=ActionEnum(new_status.value),
-            actor_id=manager.id,
-            invoice_id=inv.id,
-        )
+    # Single conditional UPDATE: the status check and the write are one
+    # statement, so concurrent approve/reject calls cannot both succeed.
+    inv = await db.scalar(
+        update(Invoice)
+        .where(Invoice.id == invoice_id, Invoice.status == StatusEnum.Pending)
+        .values(status=new_status, manager_comment=comment)
+        .returning(Invoice)
     )
+    if inv is None:
+        if await db.scalar(select(Invoice.id).where(Invoice.id == invoice_id)):
+            raise HTTPException(409, "Already processed")
+        raise HTTPException(404, "Invoice not found")
+
+    await _record_transitions(db, [inv], new_status, manager.id)
     await db.commit()
-    await db.refresh(inv)
     return inv
 
 
 @router.post("/{invoice_id}/approve", response_model=InvoiceOut)
 async def approve(
-    invoice_id: int,
+    invoice_id: RowId,
     body: dict | None = None,
     manager=Depends(current_manager),
     db: AsyncSession = Depends(get_db),
@@ -79,7 +312,7 @@ async def approve(
 
 @router.post("/{invoice_id}/reject", response_model=InvoiceOut)
 async def reject(
-    invoice_id: int,
+    invoice_id: RowId,
     body: dict | None = None,
     manager=Depends(current_manager),
     db: AsyncSession = Depends(get_db),
@@ -89,17 +322,133 @@ async def reject(
     )
 
 
-@router.get("/{invoice_id}/history")
-async def history(invoice_id: int, db: AsyncSession = Depends(get_db)):
-    inv = await db.get(
-        Invoice,
-        invoice_id,
-        options=[selectinload(Invoice.history)],    # ← force eager load
+@router.post("/bulk-transition", response_model=BulkTransitionOut)
+async def bulk_transition(
+    body: BulkTransitionRequest,
+    manager=Depends(current_manager),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Approves or rejects up to 1000 invoices with one conditional UPDATE;
+    reports per id whether it was transitioned, not found or already processed.
+    """
+    ids = list(dict.fromkeys(body.ids))
+    new_status = StatusEnum(body.status)
+    moved = (
+        await db.execute(
+            update(Invoice)
+            .where(Invoice.id.in_(ids), Invoice.status == StatusEnum.Pending)
+            .values(status=new_status, manager_comment=body.comment)
+            .returning(Invoice.id, Invoice.uploaded_by, Invoice.date, Invoice.amount_cents)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    if moved:
+        await _record_transitions(db, moved, new_status, manager.id)
+
+    moved_ids = {r.id for r in moved}
+    rest = [i for i in ids if i not in moved_ids]
+    existing = (
+        set(await db.scalars(select(Invoice.id).where(Invoice.id.in_(rest))))
+        if rest
+        else set()
+    )
+    await db.commit()
+
+    return {
+        "results": [
+            {
+                "id": i,
+                "outcome": "transitioned" if i in moved_ids
+                else "already_processed" if i in existing
+                else "not_found",
+            }
+            for i in ids
+        ]
+    }
+
+
+def _history_stmt(user, since: datetime | None):
+    """Events joined to the actor's name, scoped like the invoice listing."""
+    stmt = (
+        select(
+            InvoiceHistory.invoice_id,
+            InvoiceHistory.ts,
+            User.username.label("actor"),
+            InvoiceHistory.action,
+        )
+        .join(Invoice, Invoice.id == InvoiceHistory.invoice_id)
+        .outerjoin(User, User.id == InvoiceHistory.actor_id)
     )
-    if not inv:
-        raise HTTPException(404, "Invoice not found")
+    if user.role.value == "Employee":
+        stmt = stmt.where(Invoice.uploaded_by == user.id)
+    if since is not None:
+        stmt = stmt.where(InvoiceHistory.ts > since)
+    return stmt
+
 
-    return [
-        {"ts": h.ts, "actor": h.actor_id, "action": h.action.value}
-        for h in inv.history
-    ]
+@router.get("/history", response_model=List[InvoiceHistoryEvent])
+async def bulk_history(
+    ids: List[RowId] = Query(..., max_length=MAX_PAGE),
+    since: datetime | None = Query(None, description="only events after this time"),
+    user=Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    History of many invoices in one query, ordered by invoice then time.
+    Ids that don't exist (or belong to someone else) are simply absent.
+    """
+    stmt = _history_stmt(user, since).where(InvoiceHistory.invoice_id.in_(set(ids)))
+    stmt = stmt.order_by(InvoiceHistory.invoice_id, InvoiceHistory.ts, InvoiceHistory.id)
+    return FastJSONResponse([
+        {"ts": ts, "actor": actor, "action": action, "invoice_id": invoice_id}
+        for invoice_id, ts, actor, action in (await db.execute(stmt)).all()
+    ])
+
+
+def _history_cursor(after: str) -> tuple[datetime, int]:
+    """Parses an `X-Next-Cursor` of `/{id}/history`: `<ts>,<event id>`."""
+    ts, _, event_id = after.rpartition(",")
+    try:
+        return datetime.fromisoformat(ts), int(event_id)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor") from None
+
+
+@router.get("/{invoice_id}/history", response_model=List[HistoryEvent])
+async def history(
+    invoice_id: RowId,
+    limit: int = Query(100, ge=1, le=MAX_PAGE),
+    since: datetime | None = Query(None, description="only events after this time"),
+    after: str | None = Query(None, description="cursor: X-Next-Cursor of the previous page"),
+    user=Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Events of one invoice, oldest first, straight off the
+    `(invoice_id, ts)` index.  Poll with `since` = the last `ts` seen; when
+    a page is full the `X-Next-Cursor` header carries the `after` value for
+    the next one – `(ts, id)`, so events sharing a timestamp are neither
+    skipped nor repeated across pages.
+    """
+    stmt = _history_stmt(user, since).add_columns(InvoiceHistory.id)
+    stmt = stmt.where(InvoiceHistory.invoice_id == invoice_id)
+    if after is not None:
+        stmt = stmt.where(tuple_(InvoiceHistory.ts, InvoiceHistory.id) > _history_cursor(after))
+    stmt = stmt.order_by(InvoiceHistory.ts, InvoiceHistory.id).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        # an empty page is only a 404 when the invoice itself isn't visible
+        visible = select(Invoice.id).where(Invoice.id == invoice_id)
+        if user.role.value == "Employee":
+            visible = visible.where(Invoice.uploaded_by == user.id)
+        if await db.scalar(visible) is None:
+            raise HTTPException(404, "Invoice not found")
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = f"{rows[-1].ts.isoformat()},{rows[-1].id}"
+    return FastJSONResponse(
+        [{"ts": ts, "actor": actor, "action": action} for _, ts, actor, action, _ in rows],
+        headers=headers,
+    )
@@ -0,0 +1,35 @@
+"""
+Operational metrics.  Unauthenticated so scrapers can reach them – expose
+`/metrics` only on the internal network.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from .. import metrics
+from ..database import pool_stats
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", response_class=PlainTextResponse)
+async def prometheus():
+    """
+    Prometheus text exposition: per-route latency and queries-per-request
+    histograms, DB time, response codes, CSV ingest throughput, pool state.
+    """
+    return PlainTextResponse(
+        metrics.render(pool_stats()), media_type="text/plain; version=0.0.4"
+    )
+
+
+@router.get("/pool")
+async def pool():
+    """
+    Connection-pool snapshot, e.g.
+
+    {"pool": "TimedQueuePool", "size": 5, "checked_in": 4, "checked_out": 1,
+     "overflow": -4, "checkouts": 812, "timeouts": 0,
+     "wait_seconds_total": 0.41, "wait_seconds_max": 0.02}
+    """
+    return pool_stats()
@@ -1,23 +1,100 @@
 """
 Monthly spend & KPI reports.
 Only managers can call these endpoints.
+
+`/spend` pivots by any of employee / month / quarter / status.  Ranges made
+of whole months are answered from the monthly_spend rollup; any other range
+falls back to `invoices` with a plain range predicate on the indexed `date`
+column.
+
+JSON reports are cached per (endpoint, params) and tagged with an ETag built
+from the rollup's data version, so a dashboard re-polling with
+`If-None-Match` gets a 304 for the price of one primary-key lookup.
 """
 
-from datetime import date, datetime
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, func
+import calendar
+import enum
+import os
+import zlib
+from datetime import date
+from typing import Awaitable, Callable, Hashable, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import Integer, cast, extract, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .. import money
+from ..cache import TTLCache
 from ..database import get_db
-from ..models import Invoice, User
+from ..responses import FastJSONResponse
+from ..models import Invoice, MonthlySpend, StatusEnum, User
 from ..auth import current_manager   # RBAC: manager‑only access
+from ..services import export, rollups
+
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+# backstop for changes made behind the app's back (manual SQL, restores)
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", "300"))
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+# key -> (data version, rendered body)
+_responses = TTLCache(REPORT_CACHE_SIZE, REPORT_CACHE_TTL)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def _cached(
+    request: Request,
+    db: AsyncSession,
+    key: Hashable,
+    compute: Callable[[], Awaitable[object]],
+) -> Response:
+    version = await rollups.version(db)
+    etag = f'"{version}-{zlib.crc32(repr(key).encode()):08x}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    hit = _responses.get(key)
+    if hit is not None and hit[0] == version:
+        body = hit[1]
+    else:
+        body = FastJSONResponse(await compute()).body
+        _responses.set(key, (version, body))
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _monthly_stmt(year: int):
+    # Served from the monthly_spend rollup (employee × month × status), which
+    # upload and approve/reject keep up to date – no scan over invoices.
+    return (
+        select(
+            User.username.label("employee"),
+            MonthlySpend.month,
+            func.sum(MonthlySpend.total_cents).label("total_cents"),
+        )
+        .join(User, User.id == MonthlySpend.uploaded_by)
+        .where(MonthlySpend.year == year, MonthlySpend.count > 0)
+        .group_by(User.username, MonthlySpend.month)
+        .order_by(User.username, MonthlySpend.month)
+    )
+
+
+def _check_year(year: int) -> None:
+    if not (1900 <= year <= 2100):
+        raise HTTPException(400, "year parameter out of range")
+
 
 @router.get("/monthly")
 async def monthly_report(
     year: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     _: None = Depends(current_manager),
 ):
@@ -28,30 +105,145 @@ async def monthly_report(
       {"employee": "alice", "month": "2025-05", "total": 720.49},
       {"employee": "bob",   "month": "2025-05", "total": 145.00}
     ]
+
+    Send the returned ETag back as `If-None-Match` to get a 304 while
+    nothing has been uploaded, approved or rejected since.
     """
-    if not (1900 <= year <= 2100):
-        raise HTTPException(400, "year parameter out of range")
+    _check_year(year)
 
-    # SQLite uses strftime, Postgres uses to_char.  We'll detect driver.
-    dialect = db.bind.dialect.name
-    if dialect == "sqlite":
-        month_expr = func.strftime("%Y-%m", Invoice.date)
-        year_filter = func.strftime("%Y", Invoice.date) == str(year)
-    else:  # postgresql, mysql etc.
-        month_expr = func.to_char(Invoice.date, "YYYY-MM")
-        year_filter = func.extract("year", Invoice.date) == year
+    async def compute():
+        rows = (await db.execute(_monthly_stmt(year))).all()
+        return [
+            {
+                "employee": employee,
+                "month": f"{year}-{month:02d}",
+                "total": money.from_cents(cents),
+            }
+            for employee, month, cents in rows
+        ]
 
-    stmt = (
-        select(
-            User.username.label("employee"),
-            month_expr.label("month"),
-            func.sum(Invoice.amount).label("total"),
-        )
-        .join(User, User.id == Invoice.uploaded_by)
-        .where(year_filter)
-        .group_by("employee", "month")
-        .order_by("employee", "month")
+    return await _cached(request, db, ("monthly", year), compute)
+
+
+@router.get("/monthly/export")
+async def monthly_report_export(
+    year: int,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    _: None = Depends(current_manager),
+):
+    """Same rows as `/monthly`, streamed as CSV or NDJSON."""
+    _check_year(year)
+    return export.stream_rows(
+        _monthly_stmt(year),
+        ("employee", "month", "total"),
+        format,
+        f"monthly-{year}",
+        transform=lambda r: (
+            r.employee, f"{year}-{r.month:02d}", money.from_cents(r.total_cents)
+        ),
     )
 
-    rows = (await db.execute(stmt)).mappings().all()
-    return rows
+
+class Dimension(str, enum.Enum):
+    employee = "employee"
+    month = "month"
+    quarter = "quarter"
+    status = "status"
+
+
+def _whole_months(date_from: date | None, date_to: date | None) -> bool:
+    return (date_from is None or date_from.day == 1) and (
+        date_to is None
+        or date_to.day == calendar.monthrange(date_to.year, date_to.month)[1]
+    )
+
+
+def _spend_stmt(
+    dims: list[Dimension],
+    date_from: date | None,
+    date_to: date | None,
+    status: StatusEnum | None,
+):
+    if _whole_months(date_from, date_to):
+        src = MonthlySpend
+        year, month = MonthlySpend.year, MonthlySpend.month
+        count, cents = func.sum(MonthlySpend.count), func.sum(MonthlySpend.total_cents)
+        stmt = select().select_from(MonthlySpend)
+        if date_from is not None:
+            stmt = stmt.where(tuple_(year, month) >= (date_from.year, date_from.month))
+        if date_to is not None:
+            stmt = stmt.where(tuple_(year, month) <= (date_to.year, date_to.month))
+    else:
+        # sargable: the range is on the bare indexed column, the
+        # year/month expressions only appear in the grouping
+        src = Invoice
+        year = cast(extract("year", Invoice.date), Integer)
+        month = cast(extract("month", Invoice.date), Integer)
+        count, cents = func.count(), func.sum(Invoice.amount_cents)
+        stmt = select().select_from(Invoice)
+        if date_from is not None:
+            stmt = stmt.where(Invoice.date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Invoice.date <= date_to)
+    if status is not None:
+        stmt = stmt.where(src.status == status)
+
+    columns = []
+    for dim in dims:
+        if dim is Dimension.employee:
+            stmt = stmt.join(User, User.id == src.uploaded_by)
+            columns.append(User.username.label("employee"))
+        elif dim is Dimension.status:
+            columns.append(src.status.label("status"))
+        else:
+            part = month if dim is Dimension.month else (month + 2) // 3
+            columns += [year.label(f"{dim.value}_year"), part.label(dim.value)]
+    stmt = stmt.add_columns(*columns, count.label("count"), cents.label("total_cents"))
+    return stmt.group_by(*columns).having(count > 0).order_by(*columns)
+
+
+def _spend_row(row) -> dict:
+    out = {}
+    for key, value in row._mapping.items():
+        if key == "month":
+            out[key] = f"{row.month_year}-{value:02d}"
+        elif key == "quarter":
+            out[key] = f"{row.quarter_year}-Q{value}"
+        elif key == "total_cents":
+            out["total"] = money.from_cents(value)
+        elif key == "status":
+            out[key] = value.value
+        elif not key.endswith("_year"):
+            out[key] = value
+    return out
+
+
+@router.get("/spend")
+async def spend_report(
+    request: Request,
+    group_by: List[Dimension] = Query([Dimension.employee, Dimension.month]),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    status: StatusEnum | None = None,
+    db: AsyncSession = Depends(get_db),
+    _: None = Depends(current_manager),
+):
+    """
+    Invoice count and total per combination of the `group_by` dimensions
+    (repeat the parameter), e.g. `?group_by=employee&group_by=quarter`:
+
+    [{"employee": "alice", "quarter": "2025-Q2", "count": 3, "total": 720.49}]
+
+    Ranges of whole months (or none) are read from the rollup; day-level
+    ranges scan only the matching slice of `invoices`.  ETag as `/monthly`.
+    """
+    dims = list(dict.fromkeys(group_by))
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(400, "date_from is after date_to")
+
+    async def compute():
+        rows = (await db.execute(_spend_stmt(dims, date_from, date_to, status))).all()
+        return [_spend_row(r) for r in rows]
+
+    key = ("spend", tuple(dims), date_from, date_to, status)
+    return await _cached(request, db, key, compute)
@@ -1,7 +1,10 @@
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Literal, Optional, List
 
-from pydantic import BaseModel, PositiveFloat, constr
+from pydantic import BaseModel, PositiveFloat, conint, conlist, constr
+
+# ids are 64-bit in the database; a larger one is a 422, not a driver overflow
+RowId = conint(le=2**63 - 1)
 
 
 # ---------- AUTH ----------
@@ -48,6 +51,21 @@ class InvoiceOut(InvoiceBase):
         from_attributes = True
 
 
+class BulkTransitionRequest(BaseModel):
+    ids: conlist(RowId, min_length=1, max_length=1000)
+    status: Literal["Approved", "Rejected"]
+    comment: Optional[str] = None
+
+
+class TransitionResult(BaseModel):
+    id: int
+    outcome: Literal["transitioned", "not_found", "already_processed"]
+
+
+class BulkTransitionOut(BaseModel):
+    results: List[TransitionResult]
+
+
 # ---------- HISTORY ----------
 class HistoryEvent(BaseModel):
     ts: datetime
@@ -55,4 +73,33 @@ class HistoryEvent(BaseModel):
     action: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class InvoiceHistoryEvent(HistoryEvent):
+    invoice_id: int
+
+
+# ---------- UPLOAD JOBS ----------
+class RowError(BaseModel):
+    row: int
+    error: str
+
+
+class UploadJobOut(BaseModel):
+    id: int
+    filename: Optional[str] = None
+    status: str
+    size_bytes: int
+    rows_processed: int
+    rows_inserted: int
+    rows_rejected: int
+    errors: List[RowError] = []
+    detail: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    rows_per_sec: Optional[float] = None
+
+    class Config:
+        from_attributes = True
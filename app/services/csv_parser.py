@@ -1,42 +1,213 @@
 import csv
+import itertools
+import time
 from io import TextIOWrapper
-from datetime import datetime
-from typing import AsyncGenerator
+from datetime import date
+from typing import AsyncGenerator, Iterator
 
 from fastapi import UploadFile, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .. import metrics
+from ..money import to_cents
 from ..models import Invoice
-from ..schemas import InvoiceBase
 
 HEADER = ["invoice_number", "date", "amount", "description"]
-MAX_SIZE = 5 * 1024 * 1024  # 5 MB
+MAX_SIZE = 5 * 1024 * 1024  # 5 MB
+CHUNK_SIZE = 1000           # rows validated / duplicate‑checked per round trip
+MAX_ERRORS = 100            # row errors reported by a rejected upload
 
 
-async def stream_validate(
-    file: UploadFile, db: AsyncSession
-) -> AsyncGenerator[InvoiceBase, None]:
-    if file.size is not None and file.size > MAX_SIZE:
-        raise HTTPException(400, "File larger than 5 MB")
+# Files are decoded with errors="surrogateescape": a byte that isn't UTF-8
+# becomes a lone surrogate in its field instead of aborting the whole read,
+# so it is reported as an error of the row it is in.
+ENCODING_ERRORS = "surrogateescape"
 
-    reader = csv.DictReader(TextIOWrapper(file.file, encoding="utf‑8"))
-    if reader.fieldnames != HEADER:
-        raise HTTPException(400, "CSV header must be exactly: " + ",".join(HEADER))
 
-    for idx, row in enumerate(reader, start=2):
+class UnreadableRow(ValueError):
+    """The CSV reader itself failed; nothing after `row` can be read."""
+
+    def __init__(self, row: int, message: str):
+        super().__init__(message)
+        self.row = row
+
+
+# ---------- per-column converters ----------
+# Plain functions over the strings `csv.reader` returns: no DictReader, no
+# per-row Pydantic model.  Amounts are parsed as Decimal into integer cents.
+# Each raises ValueError with a message meant for the uploader.
+def _text(raw: str, column: str) -> str:
+    if not raw.isascii():
         try:
-            inv = InvoiceBase(
-                invoice_number=row["invoice_number"].strip(),
-                date=datetime.strptime(row["date"], "%Y-%m-%d").date(),
-                amount=float(row["amount"]),
-                description=row.get("description", ""),
+            raw.encode("utf-8")
+        except UnicodeEncodeError:
+            raise ValueError(f"{column} is not valid UTF-8") from None
+    return raw
+
+
+def _invoice_number(raw: str) -> str:
+    value = _text(raw, "invoice_number").strip()
+    if not value:
+        raise ValueError("invoice_number is required")
+    if len(value) > 64:
+        raise ValueError("invoice_number longer than 64 characters")
+    return value
+
+
+def _date(raw: str) -> date:
+    # fromisoformat is implemented in C; the shape check pins it to YYYY-MM-DD
+    if len(raw) != 10 or raw[4] != "-" or raw[7] != "-":
+        raise ValueError(f"date {raw!r} must be YYYY-MM-DD")
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise ValueError(f"date {raw!r} is not a valid date") from None
+
+
+def parse_row(row: list[str]) -> dict:
+    if len(row) not in (3, 4):
+        raise ValueError(f"expected {len(HEADER)} columns, got {len(row)}")
+    return {
+        "invoice_number": _invoice_number(row[0]),
+        "date": _date(row[1]),
+        "amount_cents": to_cents(row[2]),
+        "description": _text(row[3], "description") if len(row) == 4 else None,
+    }
+
+
+async def _find_duplicates(db: AsyncSession, chunk: list[tuple[int, dict]]) -> set[int]:
+    """
+    One `IN (...)` query per chunk; returns the row numbers whose
+    invoice_number already exists.  Ingest jobs insert each chunk before
+    reading the next, so this also catches repeats across their chunks;
+    `stream_validate` relies on its file-wide `seen` set instead.
+    """
+    numbers = [inv["invoice_number"] for _, inv in chunk]
+    existing = set(
+        (
+            await db.scalars(
+                select(Invoice.invoice_number).where(
+                    Invoice.invoice_number.in_(numbers)
+                )
             )
-            # uniqueness pre‑check
-            if await db.scalar(
-                select(Invoice).where(Invoice.invoice_number == inv.invoice_number)
-            ):
-                raise ValueError("duplicate invoice_number")
-            yield inv
-        except Exception as e:  # noqa: BLE001
-            raise HTTPException(400, f"Row {idx}: {e}")
+        ).all()
+    )
+    return {idx for idx, inv in chunk if inv["invoice_number"] in existing}
+
+
+def records(reader) -> Iterator[tuple[int, list[str]]]:
+    """
+    `(row_number, fields)` for every record after the header, numbered like
+    the file's lines.  Blank lines are skipped, as `csv.DictReader` did.
+    Raises UnreadableRow if the reader fails (e.g. a field over the size limit).
+    """
+    idx = 1
+    try:
+        for idx, row in enumerate(reader, start=2):
+            if row:
+                yield idx, row
+    except csv.Error as e:
+        raise UnreadableRow(idx + 1, f"unreadable CSV: {e}") from None
+
+
+def read_chunk(
+    rows, size: int, seen: set[str] | None = None
+) -> tuple[list[tuple[int, dict]], list[tuple[int, str]]]:
+    """
+    Pulls up to `size` rows from an iterator of `(row_number, fields)` pairs
+    and converts them.  Returns `(valid, rejected)`; repeated invoice numbers
+    are rejected within the chunk (or across calls sharing `seen`),
+    duplicates against the DB are left to `_find_duplicates`.
+    """
+    valid: list[tuple[int, dict]] = []
+    rejected: list[tuple[int, str]] = []
+    seen = set() if seen is None else seen
+    try:
+        for idx, row in rows:
+            try:
+                inv = parse_row(row)
+            except ValueError as e:
+                rejected.append((idx, str(e)))
+            else:
+                if inv["invoice_number"] in seen:
+                    rejected.append((idx, "duplicate invoice_number"))
+                else:
+                    seen.add(inv["invoice_number"])
+                    valid.append((idx, inv))
+            if len(valid) + len(rejected) >= size:
+                break
+    except UnreadableRow as e:
+        # the generator is finished: the next call returns nothing
+        rejected.append((e.row, str(e)))
+    return valid, rejected
+
+
+async def split_duplicates(
+    db: AsyncSession, valid: list[tuple[int, dict]]
+) -> tuple[list[dict], list[tuple[int, str]]]:
+    """Drops rows that already exist in the DB, reporting them as rejected."""
+    if not valid:
+        return [], []
+    dupes = await _find_duplicates(db, valid)
+    return (
+        [inv for idx, inv in valid if idx not in dupes],
+        [(idx, "duplicate invoice_number") for idx, _ in valid if idx in dupes],
+    )
+
+
+def check_header(reader) -> None:
+    """Consumes the header row, which must be exactly HEADER."""
+    try:
+        fieldnames = next(reader, None)
+    except csv.Error as e:
+        raise HTTPException(400, f"unreadable CSV: {e}") from None
+    if fieldnames != HEADER:
+        raise HTTPException(400, "CSV header must be exactly: " + ",".join(HEADER))
+
+
+def check_size(file: UploadFile) -> None:
+    if file.size is not None and file.size > MAX_SIZE:
+        raise HTTPException(400, "File larger than 5 MB")
+
+
+async def stream_validate(
+    file: UploadFile, db: AsyncSession, chunk_size: int | None = None, skip: int = 0
+) -> AsyncGenerator[list[dict], None]:
+    """
+    Validates the upload and yields lists of up to `chunk_size` invoice dicts,
+    ready for a bulk `insert(Invoice)`.  The first `skip` data rows are
+    skipped without validation (an earlier attempt already committed them).
+
+    Nothing more is yielded once a bad row is found, but the rest of the file
+    is still checked so the 400 lists every problem (up to MAX_ERRORS) as
+    `[{"row": n, "error": "..."}]`.
+    """
+    check_size(file)
+    chunk_size = chunk_size or CHUNK_SIZE
+
+    reader = csv.reader(
+        TextIOWrapper(file.file, encoding="utf-8", errors=ENCODING_ERRORS, newline="")
+    )
+    check_header(reader)
+
+    # skip counts records, so it lines up with the rows an earlier attempt committed
+    rows = itertools.islice(records(reader), skip, None)
+    seen: set[str] = set()  # whole file – bounded by MAX_SIZE
+    errors: list[tuple[int, str]] = []
+    while True:
+        t0 = time.perf_counter()
+        valid, rejected = read_chunk(rows, chunk_size, seen)
+        if not valid and not rejected:
+            break
+        _, dupes = await split_duplicates(db, valid)
+        errors += rejected + dupes
+        metrics.observe_ingest(len(valid) + len(rejected), time.perf_counter() - t0)
+        if not errors:
+            yield [inv for _, inv in valid]
+
+    if errors:
+        errors.sort()
+        raise HTTPException(
+            400, [{"row": idx, "error": err} for idx, err in errors[:MAX_ERRORS]]
+        )
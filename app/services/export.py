@@ -0,0 +1,76 @@
+"""
+Streaming CSV / NDJSON encoders for the export endpoints.
+
+Rows are pulled from a server-side cursor (`AsyncSession.stream` with
+`yield_per`) in a session owned by the generator itself – FastAPI closes
+`Depends(get_db)` sessions before a StreamingResponse body is sent.
+"""
+
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..database import SessionLocal
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+YIELD_PER = 1000
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+async def _rows(stmt, transform=None) -> AsyncIterator[tuple]:
+    async with SessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=YIELD_PER))
+        async for partition in result.partitions():
+            for row in partition:
+                yield transform(row) if transform else row
+
+
+async def _encode(rows: AsyncIterator[tuple], columns: Sequence[str], fmt: str):
+    buf = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(columns)
+        yield buf.getvalue()  # header goes out before the first query returns
+        buf.seek(0), buf.truncate()
+        write = lambda row: writer.writerow([_plain(v) for v in row])  # noqa: E731
+    else:
+        write = lambda row: buf.write(  # noqa: E731
+            json.dumps(dict(zip(columns, map(_plain, row)))) + "\n"
+        )
+
+    pending = 0
+    async for row in rows:
+        write(row)
+        pending += 1
+        if pending >= YIELD_PER:
+            yield buf.getvalue()
+            buf.seek(0), buf.truncate()
+            pending = 0
+    if pending:
+        yield buf.getvalue()
+
+
+def stream_rows(
+    stmt, columns: Sequence[str], fmt: str, filename: str, transform=None
+) -> StreamingResponse:
+    """Builds the StreamingResponse for `stmt`, whose rows match `columns`."""
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(400, "format must be one of: " + ", ".join(MEDIA_TYPES))
+    return StreamingResponse(
+        _encode(_rows(stmt, transform), columns, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
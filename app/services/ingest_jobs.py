@@ -0,0 +1,200 @@
+"""
+Background CSV ingest.
+
+`POST /invoices/upload-jobs` spools the upload to UPLOAD_DIR, creates an
+`UploadJob` row and hands the file to `start()`.  The worker runs as an
+asyncio task in the same process: parsing happens in a thread one chunk at a
+time, each chunk is duplicate-checked, bulk-inserted and committed together
+with the job's progress counters, so `GET /invoices/upload-jobs/{id}` can be
+polled while the file is being processed.
+
+Unlike the synchronous upload, invalid or duplicate rows do not abort the
+job; they are skipped and reported with their line numbers.
+
+A job whose worker died (crash, OOM kill, deploy) would stay Running forever,
+so every commit also bumps `heartbeat_at`; `fail_stale()` fails jobs that
+haven't had one for UPLOAD_JOB_STALE_SECONDS.  It runs at worker startup and
+when a poll finds such a job.
+"""
+
+import asyncio
+import csv
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import metrics
+from ..database import SessionLocal
+from ..models import Invoice, JobStatusEnum, StatusEnum, UploadJob
+from . import rollups
+
+UPLOAD_DIR = Path(
+    os.getenv("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "invoice-uploads"))
+)
+MAX_JOB_SIZE = int(os.getenv("MAX_JOB_SIZE", 512 * 1024 * 1024))  # 512 MB
+MAX_JOB_ERRORS = 1000  # row errors kept on the job; the count is always exact
+JOB_STALE_SECONDS = float(os.getenv("UPLOAD_JOB_STALE_SECONDS", "300"))
+_SPOOL_BLOCK = 1024 * 1024
+
+_tasks: set[asyncio.Task] = set()
+
+
+async def spool(file: UploadFile) -> tuple[Path, int]:
+    """
+    Copies the upload to UPLOAD_DIR block by block, enforcing MAX_JOB_SIZE.
+    The disk writes run in a thread so a slow disk doesn't stall the loop.
+    """
+    if file.size is not None and file.size > MAX_JOB_SIZE:
+        raise HTTPException(400, f"File larger than {MAX_JOB_SIZE // 2**20} MB")
+
+    out = await asyncio.to_thread(_open_spool)
+    path, size = Path(out.name), 0
+    try:
+        with out:
+            while block := await file.read(_SPOOL_BLOCK):
+                size += len(block)
+                if size > MAX_JOB_SIZE:
+                    raise HTTPException(
+                        400, f"File larger than {MAX_JOB_SIZE // 2**20} MB"
+                    )
+                await asyncio.to_thread(out.write, block)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path, size
+
+
+def _open_spool():
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    return tempfile.NamedTemporaryFile("wb", suffix=".csv", dir=UPLOAD_DIR, delete=False)
+
+
+def start(job_id: int, path: Path) -> None:
+    """Schedules the worker; a reference is kept so the task isn't collected."""
+    task = asyncio.create_task(run(job_id, path))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def shutdown() -> None:
+    for task in list(_tasks):
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+
+
+def is_stale(job: UploadJob) -> bool:
+    if job.status not in (JobStatusEnum.Queued, JobStatusEnum.Running):
+        return False
+    last = job.heartbeat_at or job.created_at
+    return datetime.utcnow() - last > timedelta(seconds=JOB_STALE_SECONDS)
+
+
+async def fail_stale(db: AsyncSession, job_id: int | None = None) -> int:
+    """
+    Marks Queued / Running jobs (all, or just `job_id`) that have gone
+    JOB_STALE_SECONDS without a heartbeat as Failed; returns how many.
+    """
+    now = datetime.utcnow()
+    stmt = (
+        update(UploadJob)
+        .where(
+            UploadJob.status.in_([JobStatusEnum.Queued, JobStatusEnum.Running]),
+            func.coalesce(UploadJob.heartbeat_at, UploadJob.created_at)
+            < now - timedelta(seconds=JOB_STALE_SECONDS),
+        )
+        .values(
+            status=JobStatusEnum.Failed,
+            detail="Interrupted: the worker running the job stopped",
+            finished_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if job_id is not None:
+        stmt = stmt.where(UploadJob.id == job_id)
+    failed = (await db.execute(stmt)).rowcount
+    await db.commit()
+    return failed
+
+
+def _record_rejects(job: UploadJob, rejected: list[tuple[int, str]]) -> None:
+    if not rejected:
+        return
+    job.rows_rejected += len(rejected)
+    room = MAX_JOB_ERRORS - len(job.errors)
+    if room > 0:
+        # reassign so the JSON column is flagged dirty
+        job.errors = job.errors + [
+            {"row": idx, "error": err} for idx, err in rejected[:room]
+        ]
+
+
+async def run(job_id: int, path: Path) -> None:
+    # the parser is loaded on first use, not at worker boot
+    from .csv_parser import (
+        CHUNK_SIZE, ENCODING_ERRORS, check_header, read_chunk, records,
+        split_duplicates,
+    )
+
+    async with SessionLocal() as db:
+        job = await db.get(UploadJob, job_id)
+        job.status = JobStatusEnum.Running
+        job.started_at = job.heartbeat_at = datetime.utcnow()
+        await db.commit()
+
+        try:
+            with path.open(newline="", encoding="utf-8", errors=ENCODING_ERRORS) as fh:
+                reader = csv.reader(fh)
+                try:
+                    check_header(reader)
+                except HTTPException as e:
+                    raise ValueError(e.detail)
+
+                rows = records(reader)
+                while True:
+                    t0 = time.perf_counter()
+                    valid, rejected = await asyncio.to_thread(
+                        read_chunk, rows, CHUNK_SIZE
+                    )
+                    if not valid and not rejected:
+                        break
+                    fresh, dupes = await split_duplicates(db, valid)
+                    metrics.observe_ingest(
+                        len(valid) + len(rejected), time.perf_counter() - t0
+                    )
+                    deltas = rollups.new_deltas()
+                    for inv in fresh:
+                        inv["uploaded_by"] = job.uploaded_by
+                        rollups.add(
+                            deltas, job.uploaded_by, inv["date"],
+                            StatusEnum.Pending, inv["amount_cents"],
+                        )
+                    if fresh:
+                        await db.execute(insert(Invoice), fresh)
+                        await rollups.apply(db, deltas)
+
+                    job.rows_processed += len(valid) + len(rejected)
+                    job.rows_inserted += len(fresh)
+                    _record_rejects(job, sorted(rejected + dupes))
+                    job.heartbeat_at = datetime.utcnow()
+                    await db.commit()
+
+            job.status = JobStatusEnum.Completed
+        except asyncio.CancelledError:
+            await db.rollback()
+            job.status = JobStatusEnum.Failed
+            job.detail = "Interrupted by server shutdown"
+            raise
+        except Exception as e:  # noqa: BLE001
+            await db.rollback()
+            job.status = JobStatusEnum.Failed
+            job.detail = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            await db.commit()
+            path.unlink(missing_ok=True)
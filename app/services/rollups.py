@@ -0,0 +1,111 @@
+"""
+Incremental maintenance of the `monthly_spend` rollup.
+
+Writers collect `(uploaded_by, year, month, status) -> [count, cents]` deltas
+with `add()` and flush them with `apply()` inside their own transaction, so
+the rollup always commits (or rolls back) together with the invoices it
+describes.  `rebuild()` recomputes the table from scratch for backfills.
+
+Both also bump the `reports` data version, which the report endpoints turn
+into their ETag: whatever changes the rollup changes the version, and the
+bump commits with it, so every worker sees it at the same time.
+"""
+
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import delete, extract, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import DataVersion, Invoice, MonthlySpend, StatusEnum
+
+Key = tuple[int, int, int, StatusEnum]
+VERSION = "reports"
+
+
+def _insert(db: AsyncSession):
+    return sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+
+
+def new_deltas() -> dict[Key, list]:
+    return defaultdict(lambda: [0, 0])
+
+
+def add(
+    deltas: dict[Key, list],
+    uploaded_by: int,
+    day: date,
+    status: StatusEnum,
+    amount_cents: int,
+    sign: int = 1,
+) -> None:
+    d = deltas[(uploaded_by, day.year, day.month, status)]
+    d[0] += sign
+    d[1] += sign * amount_cents
+
+
+async def apply(db: AsyncSession, deltas: dict[Key, list]) -> None:
+    """Upserts the deltas with a single executemany statement."""
+    if not deltas:
+        return
+    stmt = _insert(db)(MonthlySpend)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["uploaded_by", "year", "month", "status"],
+        set_={
+            "count": MonthlySpend.count + stmt.excluded.count,
+            "total_cents": MonthlySpend.total_cents + stmt.excluded.total_cents,
+        },
+    )
+    # sorted so concurrent writers lock rollup rows in the same order
+    params = [
+        {
+            "uploaded_by": uid,
+            "year": year,
+            "month": month,
+            "status": status,
+            "count": count,
+            "total_cents": cents,
+        }
+        for (uid, year, month, status), (count, cents) in sorted(deltas.items())
+    ]
+    await db.execute(stmt, params)
+    await _bump(db)
+
+
+async def _bump(db: AsyncSession) -> None:
+    # taken after the rollup rows, so writers still lock in one global order
+    stmt = _insert(db)(DataVersion).values(name=VERSION, version=1)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["name"], set_={"version": DataVersion.version + 1}
+        )
+    )
+
+
+async def version(db: AsyncSession) -> int:
+    """Current version of the rollup; changes on every committed write to it."""
+    return await db.scalar(
+        select(DataVersion.version).where(DataVersion.name == VERSION)
+    ) or 0
+
+
+async def rebuild(db: AsyncSession) -> None:
+    """Replaces the rollup with a fresh aggregate over `invoices`."""
+    year = extract("year", Invoice.date)
+    month = extract("month", Invoice.date)
+    await db.execute(delete(MonthlySpend))
+    await db.execute(
+        MonthlySpend.__table__.insert().from_select(
+            ["uploaded_by", "year", "month", "status", "count", "total_cents"],
+            select(
+                Invoice.uploaded_by,
+                year,
+                month,
+                Invoice.status,
+                func.count(),
+                func.sum(Invoice.amount_cents),
+            ).group_by(Invoice.uploaded_by, year, month, Invoice.status),
+        )
+    )
+    await _bump(db)
@@ -0,0 +1,69 @@
+"""
+Invoice search for `GET /invoices/search`.
+
+The query is split into words and every word must match the start of a word
+in the invoice number or the description, so `inv-20` finds `INV-2024-…` and
+`air tax` finds "Airport taxi".  `-` and `/` belong to words, as in the
+SQLite index, so an invoice number is a single word.  Words are re-quoted before they reach the
+full-text syntax, so user input never becomes an operator.
+
+SQLite goes through the `invoices_fts` FTS5 index and orders by its bm25
+rank (number hits weigh 4x).  PostgreSQL matches the weighted tsvector that
+migration 0006 indexes, or a trigram substring match on the number, ordered
+by `ts_rank`.  Either way the caller's scoping and filters are plain WHERE
+clauses on `invoices`, applied after the index lookup.
+"""
+
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import Select, column, func, literal_column, or_, table, text
+
+from ..models import Invoice
+
+MAX_TERMS = 8
+_WORD = re.compile(r"(?:[^\W_]|[-/])+")
+_PART = re.compile(r"[^\W_]+")
+
+_fts = table("invoices_fts", column("rowid"), column("rank"))
+_FTS_MATCH = text("invoices_fts MATCH :q")
+
+# must stay identical to the ix_invoices_search expression (migration 0006)
+_PG_DOCUMENT = literal_column(
+    "(setweight(to_tsvector('simple'::regconfig, coalesce(invoice_number, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B'))"
+)
+
+
+def terms(q: str) -> list[str]:
+    words = [w.strip("-/") for w in _WORD.findall(q.lower())]
+    words = [w for w in words if w][:MAX_TERMS]
+    if not words:
+        raise HTTPException(400, "Search needs at least one letter or digit")
+    return words
+
+
+def _like_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply(stmt: Select, q: str, dialect: str) -> Select:
+    """Restricts a `select(Invoice)` to matches of `q`, best match first."""
+    words = terms(q)
+    if dialect == "sqlite":
+        return (
+            stmt.join(_fts, _fts.c.rowid == Invoice.id)
+            .where(_FTS_MATCH.bindparams(q=" ".join(f'"{w}"*' for w in words)))
+            .order_by(_fts.c.rank, Invoice.id)
+        )
+    # the tsvector parser splits hyphenated words (and also keeps them whole)
+    parts = _PART.findall(" ".join(words))
+    query = func.to_tsquery(
+        literal_column("'simple'::regconfig"), " & ".join(f"{w}:*" for w in parts)
+    )
+    return stmt.where(
+        or_(
+            _PG_DOCUMENT.op("@@")(query),
+            Invoice.invoice_number.ilike(f"%{_like_escape(q.strip())}%", escape="\\"),
+        )
+    ).order_by(func.ts_rank(_PG_DOCUMENT, query).desc(), Invoice.id)
@@ -0,0 +1,116 @@
+"""
+Idempotent, resumable `POST /invoices/upload`.
+
+Every upload is recorded as an `UploadBatch` keyed per uploader by the
+SHA-256 of the file and, optionally, the client's `Idempotency-Key`.  The
+route validates the whole file first, then inserts it chunk by chunk; each
+chunk commits together with `advance()`, so `rows_committed` always equals
+the number of the file's rows that landed (tagged with `batch_id`).
+
+A retry of the same upload therefore either replays the completed batch's
+result without parsing anything, or resumes after the last committed chunk:
+the file is identical, so its first `rows_committed` rows are the ones
+already in the database.
+"""
+
+import hashlib
+from datetime import datetime
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import JobStatusEnum, UploadBatch
+
+_BLOCK = 1024 * 1024
+_IN_PROGRESS = "This upload is already being processed; retry later"
+
+
+async def digest(file: UploadFile) -> str:
+    """SHA-256 of the upload; the file is rewound for parsing."""
+    h = hashlib.sha256()
+    while block := await file.read(_BLOCK):
+        h.update(block)
+    await file.seek(0)
+    return h.hexdigest()
+
+
+async def find(
+    db: AsyncSession, uploaded_by: int, content_hash: str, key: str | None
+) -> UploadBatch | None:
+    """
+    The caller's earlier batch for this file, if any.  An Idempotency-Key
+    that was already used for different content is refused.
+    """
+    match = UploadBatch.content_hash == content_hash
+    if key is not None:
+        match = or_(match, UploadBatch.idempotency_key == key)
+    batches = (
+        await db.scalars(
+            select(UploadBatch).where(UploadBatch.uploaded_by == uploaded_by, match)
+        )
+    ).all()
+    if key is not None and any(
+        b.idempotency_key == key and b.content_hash != content_hash for b in batches
+    ):
+        raise HTTPException(422, "Idempotency-Key was already used for a different file")
+    return next((b for b in batches if b.content_hash == content_hash), None)
+
+
+async def create(
+    db: AsyncSession,
+    uploaded_by: int,
+    content_hash: str,
+    key: str | None,
+    filename: str | None,
+    rows_total: int,
+) -> UploadBatch:
+    """Adds the batch to the current transaction (committed with chunk one)."""
+    done = rows_total == 0
+    batch = UploadBatch(
+        uploaded_by=uploaded_by,
+        content_hash=content_hash,
+        idempotency_key=key,
+        filename=filename,
+        status=JobStatusEnum.Completed if done else JobStatusEnum.Running,
+        rows_total=rows_total,
+        rows_committed=0,
+        finished_at=datetime.utcnow() if done else None,
+    )
+    db.add(batch)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # a concurrent request created the same batch first
+        raise HTTPException(409, _IN_PROGRESS)
+    return batch
+
+
+async def advance(db: AsyncSession, batch: UploadBatch, rows: int) -> None:
+    """
+    Moves `rows_committed` on by one chunk, in the chunk's transaction.  Run
+    it before the chunk's INSERT: the conditional UPDATE both detects and
+    (by locking the batch row) serialises concurrent resumes of one batch.
+    """
+    committed = batch.rows_committed + rows
+    done = committed == batch.rows_total
+    moved = await db.scalar(
+        update(UploadBatch)
+        .where(
+            UploadBatch.id == batch.id,
+            UploadBatch.rows_committed == batch.rows_committed,
+        )
+        .values(
+            rows_committed=committed,
+            status=JobStatusEnum.Completed if done else JobStatusEnum.Running,
+            finished_at=datetime.utcnow() if done else None,
+        )
+        .returning(UploadBatch.id)
+    )
+    if moved is None:
+        raise HTTPException(409, _IN_PROGRESS)
+
+
+def result(batch: UploadBatch) -> dict:
+    return {"inserted": batch.rows_committed, "batch_id": batch.id}
@@ -0,0 +1,100 @@
+"""
+Startup profiling for autoscaled workers.
+
+With STARTUP_PROFILE=1 the worker prints, once lifespan startup is done,
+where its boot time went: module imports grouped by package (self time, as
+in `python -X importtime`; `app.*` modules individually) and every
+`phase()` the lifespan timed.  Timing starts when the `app` package is
+first imported, so the interpreter and uvicorn's own imports are not
+included.  Without the variable nothing is installed.
+"""
+
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+ENABLED = os.getenv("STARTUP_PROFILE", "0") == "1"
+TOP_IMPORTS = 15
+
+_t0 = time.perf_counter()
+_imports: dict[str, float] = defaultdict(float)  # package -> self seconds
+_open: list[float] = []                          # child seconds per open import
+_phases: list[tuple[str, float]] = []
+
+
+class _TimedLoader:
+    """Wraps a module's loader to time its `exec_module` minus nested imports."""
+
+    def __init__(self, loader, name: str):
+        self._loader = loader
+        self._key = name if name.startswith("app.") else name.partition(".")[0]
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        _open.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            spent = time.perf_counter() - t0
+            _imports[self._key] += spent - _open.pop()
+            if _open:
+                _open[-1] += spent
+
+
+class _Finder:
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            find = getattr(finder, "find_spec", None)
+            if finder is self or find is None:
+                continue
+            spec = find(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, name)
+        return spec
+
+
+_finder = _Finder()
+
+
+def install() -> None:
+    if ENABLED and _finder not in sys.meta_path:
+        sys.meta_path.insert(0, _finder)
+
+
+@contextmanager
+def phase(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - t0))
+
+
+def report() -> None:
+    """Prints the profile (once) and stops timing imports."""
+    if not ENABLED or _finder not in sys.meta_path:
+        return
+    sys.meta_path.remove(_finder)
+    ms = lambda s: f"{s * 1000:8.1f} ms"  # noqa: E731
+    top = sorted(_imports.items(), key=lambda kv: -kv[1])
+    lines = [
+        f"startup profile (pid {os.getpid()}): {ms(time.perf_counter() - _t0)} to ready",
+        f"  imports{'':26}{ms(sum(_imports.values()))}",
+        *(f"    {pkg:31}{ms(s)}" for pkg, s in top[:TOP_IMPORTS]),
+        f"    {'(other)':31}{ms(sum(s for _, s in top[TOP_IMPORTS:]))}",
+        "  lifespan",
+        *(f"    {name:31}{ms(s)}" for name, s in _phases),
+    ]
+    print("\n".join(lines), file=sys.stderr, flush=True)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+scripts/bench_json.py
+---------------------
+
+Rows/sec of building a `GET /invoices` page (fetch + JSON encoding, no
+HTTP), against a throw-away SQLite database seeded with scripts/generate_data:
+
+  $ python -m scripts.bench_json --rows 1000,10000
+
+Compares the previous path (ORM objects, then FastAPI's response_model
+validation and serialization, then `JSONResponse`) with the one the list
+endpoints use now (plain column tuples encoded by `FastJSONResponse`).
+Both must produce the same bytes.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+# always a fresh database of our own, whatever DATABASE_URL the shell exports
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench_json.db"
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Invoice  # noqa: E402
+from app.routers.invoices import _INVOICE_COLUMNS, _invoices_json  # noqa: E402
+from scripts.generate_data import generate  # noqa: E402
+
+_route = next(r for r in app.routes if getattr(r, "path", None) == "/invoices")
+_field = _route.secure_cloned_response_field or _route.response_field
+
+
+async def legacy(n: int) -> bytes:
+    async with SessionLocal() as db:
+        rows = (await db.scalars(select(Invoice).order_by(Invoice.id).limit(n))).all()
+        content = await serialize_response(field=_field, response_content=rows)
+        return JSONResponse(content).body
+
+
+async def fast(n: int) -> bytes:
+    async with SessionLocal() as db:
+        stmt = select(*_INVOICE_COLUMNS).order_by(Invoice.id).limit(n)
+        return _invoices_json((await db.execute(stmt)).all(), n, None).body
+
+
+async def _best(fn, n: int, repeat: int) -> tuple[dict, bytes]:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        body = await fn(n)
+        best = min(best, time.perf_counter() - t0)
+    return {"seconds": round(best, 4), "rows_per_sec": round(n / best)}, body
+
+
+async def main(args: argparse.Namespace) -> dict:
+    await generate(10, 1, max(args.rows), verbose=False)
+    results = {}
+    for n in args.rows:
+        old, old_body = await _best(legacy, n, args.repeat)
+        new, new_body = await _best(fast, n, args.repeat)
+        assert old_body == new_body, "responses differ"
+        results[f"{n}_rows"] = {
+            "legacy": old,
+            "fast": new,
+            "speedup": round(new["rows_per_sec"] / old["rows_per_sec"], 2),
+        }
+    await engine.dispose()
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Invoice list JSON rows/sec, old vs new")
+    p.add_argument("--rows", type=lambda s: [int(x) for x in s.split(",")],
+                   default=[100, 1_000, 10_000])
+    p.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(main(parse_args())), indent=2))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+scripts/bench_login.py
+----------------------
+
+Measures how a burst of logins affects everybody else on the same worker.
+Runs the app in-process (httpx ASGI transport, throw-away SQLite DB), fires
+`--logins` concurrent `POST /login` calls while `--readers` clients keep
+polling `GET /invoices`, and reports latency percentiles for both.
+
+The run is repeated with bcrypt inline on the event loop (the old behaviour,
+PASSWORD_HASH_WORKERS=0) and on the hashing pool:
+
+  $ python -m scripts.bench_login --logins 40 --readers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("LOGIN_RATE_LIMIT", "0")  # every login comes from one IP
+# always a fresh database of our own, whatever DATABASE_URL the shell exports
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+
+import httpx  # noqa: E402
+
+from app import auth  # noqa: E402
+from app import migrations  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import RoleEnum, User  # noqa: E402
+
+
+def _summary(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]  # noqa: E731
+    return {
+        "n": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 1),
+        "p95_ms": round(pick(0.95) * 1000, 1),
+        "max_ms": round(samples[-1] * 1000, 1),
+    }
+
+
+async def _setup() -> None:
+    await migrations.upgrade(engine)
+    async with SessionLocal() as session:
+        session.add_all(
+            [
+                User(username="emp", password_hash=auth.hash_pwd("secret"), role=RoleEnum.Employee),
+                User(username="mgr", password_hash=auth.hash_pwd("secret"), role=RoleEnum.Manager),
+            ]
+        )
+        await session.commit()
+
+
+async def _run(client: httpx.AsyncClient, logins: int, readers: int) -> dict:
+    r = await client.post("/login", data={"username": "mgr", "password": "secret"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    login_lat: list[float] = []
+    read_lat: list[float] = []
+    done = asyncio.Event()
+
+    async def login() -> None:
+        t0 = time.perf_counter()
+        r = await client.post("/login", data={"username": "emp", "password": "secret"})
+        r.raise_for_status()
+        login_lat.append(time.perf_counter() - t0)
+
+    async def reader() -> None:
+        while not done.is_set():
+            t0 = time.perf_counter()
+            (await client.get("/invoices", headers=headers)).raise_for_status()
+            read_lat.append(time.perf_counter() - t0)
+            await asyncio.sleep(0.005)
+
+    polling = [asyncio.create_task(reader()) for _ in range(readers)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    wall = time.perf_counter() - t0
+    done.set()
+    await asyncio.gather(*polling)
+    return {
+        "logins_per_sec": round(logins / wall, 1),
+        "login": _summary(login_lat),
+        "invoices": _summary(read_lat),
+    }
+
+
+async def main(args: argparse.Namespace) -> dict:
+    await _setup()
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, workers in (("inline", 0), ("pool", args.workers)):
+            auth.HASH_WORKERS = workers
+            auth._hash_pool = None
+            results[label] = await _run(client, args.logins, args.readers)
+    await engine.dispose()
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Concurrent /login vs /invoices latency")
+    p.add_argument("--logins", type=int, default=40, help="concurrent logins")
+    p.add_argument("--readers", type=int, default=4, help="clients polling /invoices")
+    p.add_argument("--workers", type=int, default=auth.HASH_WORKERS or 4,
+                   help="hashing pool size for the 'pool' run")
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(main(parse_args())), indent=2))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+scripts/bench_rate_limit.py
+---------------------------
+
+Login rate-limiter throughput and memory with many distinct client IPs
+(credential stuffing).  Compares the previous list-of-timestamps limiter with
+the sliding-window-counter backends in `app.dependencies`:
+
+  $ python -m scripts.bench_rate_limit --ips 100000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from app.dependencies import MemoryBackend, SQLiteBackend
+
+
+class LegacyLimiter:
+    """The original per-process implementation, kept for comparison."""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = timedelta(seconds=window)
+        self._buckets: dict[str, list[datetime]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def hit(self, key: str, now: float) -> bool:
+        ts = datetime.fromtimestamp(now, timezone.utc)
+        self._buckets[key] = [t for t in self._buckets[key] if ts - t < self.window]
+        if len(self._buckets[key]) >= self.limit:
+            return False
+        self._buckets[key].append(ts)
+        return True
+
+
+def _ips(n: int) -> list[str]:
+    return [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(n)]
+
+
+def run(backend, ips: list[str], hits_per_ip: int, window: float) -> dict:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    now = 1_000_000 * window
+    for _ in range(hits_per_ip):
+        for ip in ips:
+            backend.hit(ip, now)
+        now += 1
+    elapsed = time.perf_counter() - t0
+    # two windows later: a fresh wave of IPs; idle ones should be gone
+    for ip in ips[:1000]:
+        backend.hit("x" + ip, now + 2 * window)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    hits = hits_per_ip * len(ips)
+    return {
+        "hits": hits,
+        "hits_per_sec": round(hits / elapsed),
+        "peak_mb": round(peak / 2**20, 1),
+        "keys_after_idle": len(backend),
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Login rate-limiter benchmark")
+    p.add_argument("--ips", type=int, default=100_000)
+    p.add_argument("--hits-per-ip", type=int, default=3)
+    p.add_argument("--limit", type=int, default=5)
+    p.add_argument("--window", type=float, default=60)
+    p.add_argument("--skip-sqlite", action="store_true")
+    args = p.parse_args()
+
+    ips = _ips(args.ips)
+    results = {
+        "legacy": run(LegacyLimiter(args.limit, args.window), ips, args.hits_per_ip, args.window),
+        "memory": run(MemoryBackend(args.limit, args.window), ips, args.hits_per_ip, args.window),
+    }
+    if not args.skip_sqlite:
+        path = os.path.join(tempfile.mkdtemp(), "rl.db")
+        results["sqlite"] = run(
+            SQLiteBackend(args.limit, args.window, path), ips, args.hits_per_ip, args.window
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
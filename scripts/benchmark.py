@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+"""
+scripts/benchmark.py
+--------------------
+
+Reproducible benchmark of the API hot paths.  Runs fully offline: the app is
+driven in-process through httpx's ASGI transport against a throw-away SQLite
+database that is seeded in bulk first (see scripts/generate_data.py).
+
+  $ python -m scripts.benchmark --invoices 1000000 --out bench.json
+  $ python -m scripts.benchmark --only upload,list --compare bench.json
+
+Scenarios
+  upload    POST /invoices/upload with 1k / 10k / 60k-row CSVs (rows/sec)
+  list      GET /invoices, first page and a deep keyset page (latency)
+  search    GET /invoices/search, selective number prefix and a common
+            description word (latency)
+  report    GET /reports/monthly over the seeded history, fresh and revalidated
+            with If-None-Match; uncached GET /reports/spend by employee and
+            quarter over whole months (rollup) and over a day range (latency)
+  login     concurrent POST /login (logins/sec, latency)
+  approve   concurrent approve/reject of the same pending invoices (contention)
+
+Results are printed (and optionally written) as JSON together with the git
+revision, so runs from two commits can be diffed with `--compare`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+os.environ.setdefault("LOGIN_RATE_LIMIT", "0")
+# always a fresh database of our own, whatever DATABASE_URL the shell exports
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/benchmark.db"
+
+import httpx  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.routers import reports  # noqa: E402
+from scripts.generate_data import PASSWORD, generate  # noqa: E402
+
+SCENARIOS = ("upload", "list", "search", "report", "login", "approve")
+EMPLOYEE, MANAGER = "bench-emp0", "bench-mgr0"
+
+
+# ---------- helpers ----------------------------------------------------------
+def _latency(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]  # noqa: E731
+    return {
+        "n": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "p95_ms": round(pick(0.95) * 1000, 2),
+        "p99_ms": round(pick(0.99) * 1000, 2),
+    }
+
+
+async def _timed(n: int, call) -> dict:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        r = await call()
+        samples.append(time.perf_counter() - t0)
+        if r.status_code != 304:
+            r.raise_for_status()
+    return _latency(samples)
+
+
+def _csv(rows: int, prefix: str) -> str:
+    start = date(2025, 1, 1)
+    lines = ["invoice_number,date,amount,description"]
+    lines += [
+        f"{prefix}-{i},{start + timedelta(days=i % 365)},{(i % 5000) / 100 + 1:.2f},bench row {i}"
+        for i in range(rows)
+    ]
+    return "\n".join(lines) + "\n"
+
+
+async def seed(users: int, invoices: int) -> None:
+    await generate(users, 1, invoices, prefix="BENCH", verbose=False)
+
+
+async def _token(client: httpx.AsyncClient, username: str) -> dict:
+    r = await client.post("/login", data={"username": username, "password": PASSWORD})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+# ---------- scenarios --------------------------------------------------------
+async def bench_upload(client, args) -> dict:
+    emp = await _token(client, EMPLOYEE)
+    out = {}
+    for rows in args.upload_rows:
+        body = _csv(rows, f"UP{rows}")
+        t0 = time.perf_counter()
+        r = await client.post(
+            "/invoices/upload", headers=emp, files={"file": ("b.csv", body, "text/csv")}
+        )
+        elapsed = time.perf_counter() - t0
+        r.raise_for_status()
+        out[f"{rows}_rows"] = {
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(rows / elapsed),
+        }
+    return out
+
+
+async def bench_list(client, args) -> dict:
+    mgr = await _token(client, MANAGER)
+    deep = max(args.invoices - 500, 0)
+    return {
+        "first_page": await _timed(
+            args.requests, lambda: client.get("/invoices", headers=mgr)
+        ),
+        "deep_page": await _timed(
+            args.requests,
+            lambda: client.get("/invoices", headers=mgr, params={"after": deep}),
+        ),
+        "filtered_status": await _timed(
+            args.requests,
+            lambda: client.get("/invoices", headers=mgr, params={"status": "Pending"}),
+        ),
+    }
+
+
+async def bench_search(client, args) -> dict:
+    mgr = await _token(client, MANAGER)
+    queries = {"number_prefix": f"BENCH-{args.invoices // 2:09d}"[:-2], "description": "taxi"}
+    return {
+        name: await _timed(
+            args.requests,
+            lambda q=q: client.get("/invoices/search", headers=mgr, params={"q": q}),
+        )
+        for name, q in queries.items()
+    }
+
+
+def _uncached(client, headers: dict, date_from: str, date_to: str):
+    reports._responses.clear()
+    return client.get("/reports/spend", headers=headers, params={
+        "group_by": ["employee", "quarter"], "date_from": date_from, "date_to": date_to,
+    })
+
+
+async def bench_report(client, args) -> dict:
+    mgr = await _token(client, MANAGER)
+    params = {"year": 2024}
+    etag = (await client.get("/reports/monthly", headers=mgr, params=params)).headers["etag"]
+    cached = {**mgr, "If-None-Match": etag}
+    return {
+        "monthly": await _timed(
+            args.requests,
+            lambda: client.get("/reports/monthly", headers=mgr, params=params),
+        ),
+        "monthly_304": await _timed(
+            args.requests,
+            lambda: client.get("/reports/monthly", headers=cached, params=params),
+        ),
+        "spend_months": await _timed(
+            args.requests, lambda: _uncached(client, mgr, "2024-01-01", "2024-12-31")
+        ),
+        "spend_days": await _timed(
+            args.requests, lambda: _uncached(client, mgr, "2024-01-02", "2024-02-10")
+        ),
+    }
+
+
+async def bench_login(client, args) -> dict:
+    samples = []
+
+    async def one():
+        t0 = time.perf_counter()
+        (await client.post(
+            "/login", data={"username": EMPLOYEE, "password": PASSWORD}
+        )).raise_for_status()
+        samples.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.logins)))
+    wall = time.perf_counter() - t0
+    return {"logins_per_sec": round(args.logins / wall, 2), "latency": _latency(samples)}
+
+
+async def bench_approve(client, args) -> dict:
+    emp, mgr = await _token(client, EMPLOYEE), await _token(client, MANAGER)
+    targets = 20
+    (await client.post(
+        "/invoices/upload",
+        headers=emp,
+        files={"file": ("c.csv", _csv(targets, "CONTEND"), "text/csv")},
+    )).raise_for_status()
+    ids = [
+        inv["id"]
+        for inv in (
+            await client.get(
+                "/invoices", headers=mgr,
+                params={"status": "Pending", "after": args.invoices, "limit": targets},
+            )
+        ).json()
+    ]
+    codes: list[int] = []
+    samples: list[float] = []
+
+    async def hit(i: int):
+        action = "approve" if i % 2 else "reject"
+        t0 = time.perf_counter()
+        r = await client.post(f"/invoices/{ids[i % len(ids)]}/{action}", headers=mgr, json={})
+        samples.append(time.perf_counter() - t0)
+        codes.append(r.status_code)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(hit(i) for i in range(args.contenders)))
+    wall = time.perf_counter() - t0
+    return {
+        "requests_per_sec": round(args.contenders / wall, 1),
+        "succeeded": codes.count(200),
+        "conflicts": codes.count(409),
+        "errors": len(codes) - codes.count(200) - codes.count(409),
+        "latency": _latency(samples),
+    }
+
+
+# ---------- driver -----------------------------------------------------------
+def _revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(old: dict, new: dict, path: str = "") -> None:
+    for key, value in new.items():
+        here = f"{path}.{key}" if path else key
+        if isinstance(value, dict) and isinstance(old.get(key), dict):
+            _compare(old[key], value, here)
+        elif isinstance(value, (int, float)) and isinstance(old.get(key), (int, float)) and old[key]:
+            change = (value - old[key]) / old[key] * 100
+            print(f"{here:55} {old[key]:>12} -> {value:>12}  ({change:+.1f}%)", file=sys.stderr)
+
+
+async def main(args: argparse.Namespace) -> dict:
+    t0 = time.perf_counter()
+    await seed(args.users, args.invoices)
+    results: dict = {
+        "meta": {
+            "revision": _revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "users": args.users,
+            "invoices": args.invoices,
+            "seed_seconds": round(time.perf_counter() - t0, 1),
+        }
+    }
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name in args.only:
+            results[name] = await globals()[f"bench_{name}"](client, args)
+    await engine.dispose()
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark the invoice API hot paths")
+    p.add_argument("--users", type=int, default=100)
+    p.add_argument("--invoices", type=int, default=1_000_000)
+    p.add_argument("--upload-rows", type=lambda s: [int(x) for x in s.split(",")],
+                   default=[1_000, 10_000, 60_000])
+    p.add_argument("--requests", type=int, default=50, help="samples per latency metric")
+    p.add_argument("--logins", type=int, default=20)
+    p.add_argument("--contenders", type=int, default=100)
+    p.add_argument("--only", type=lambda s: s.split(","), default=list(SCENARIOS),
+                   help="comma separated subset of: " + ",".join(SCENARIOS))
+    p.add_argument("--out", help="write JSON results to this file")
+    p.add_argument("--compare", help="previous results file to diff against")
+    args = p.parse_args()
+    unknown = set(args.only) - set(SCENARIOS)
+    if unknown:
+        p.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            _compare(json.load(fh), results)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+scripts/generate_data.py
+------------------------
+
+Synthetic data for staging / load tests:
+
+  $ python -m scripts.generate_data --users 2000 --invoices 5000000
+  $ python -m scripts.generate_data --csv-out fixtures/ --csv-files 3 --csv-rows 60000
+
+Inserts employees + managers (all with password `secret`, hashed once),
+invoices spread over `--years` years with a realistic status mix, and one
+history row per approved/rejected invoice – all through Core executemany
+inserts in large transactions.  User ids come back through RETURNING;
+invoice ids are assigned up front (after the current max) so history rows
+need no RETURNING round trip, and PostgreSQL's id sequence is moved past
+them at the end.  The monthly report rollup is rebuilt last.
+`--csv-out` additionally writes upload fixtures in the
+`/invoices/upload` format (invoice numbers that don't collide with the DB);
+given alone, without any of the counts, it doesn't touch the database.
+
+Targets DATABASE_URL like the app; pending migrations are applied first.
+"""
+
+import argparse
+import asyncio
+import csv
+import random
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import func, insert, select
+
+from app.auth import hash_pwd
+from app import migrations
+from app.database import SessionLocal, engine
+from app.models import Invoice, InvoiceHistory, RoleEnum, StatusEnum, User
+from app.services import rollups
+
+PASSWORD = "secret"
+STATUS_WEIGHTS = ((StatusEnum.Pending, 40), (StatusEnum.Approved, 45), (StatusEnum.Rejected, 15))
+DESCRIPTIONS = (
+    "Team dinner", "Office supplies", "Taxi fare", "Conference badge", "Hotel",
+    "Train ticket", "Flight", "Client lunch", "Software licence", "Parking",
+)
+COMMENTS = {StatusEnum.Approved: "Looks good", StatusEnum.Rejected: "Missing receipt"}
+
+
+def _invoice_rows(rnd: random.Random, first_id: int, n: int, employees: list[int],
+                  managers: list[int], start: date, days: int, prefix: str):
+    """Yields (invoice_row, history_row | None) pairs."""
+    statuses = [s for s, _ in STATUS_WEIGHTS]
+    weights = [w for _, w in STATUS_WEIGHTS]
+    for i in range(first_id, first_id + n):
+        status = rnd.choices(statuses, weights)[0]
+        day = start + timedelta(days=rnd.randrange(days))
+        inv = {
+            "id": i,
+            "invoice_number": f"{prefix}-{i:09d}",
+            "date": day,
+            "amount_cents": round((rnd.lognormvariate(4, 1) + 1) * 100),
+            "description": rnd.choice(DESCRIPTIONS),
+            "status": status,
+            "uploaded_by": rnd.choice(employees),
+            "manager_comment": COMMENTS.get(status) if rnd.random() < 0.3 else None,
+        }
+        hist = None
+        if status is not StatusEnum.Pending:
+            hist = {
+                "ts": datetime.combine(day, datetime.min.time())
+                + timedelta(days=rnd.randrange(1, 15), seconds=rnd.randrange(86_400)),
+                "action": status.value,
+                "actor_id": rnd.choice(managers),
+                "invoice_id": i,
+            }
+        yield inv, hist
+
+
+async def generate(
+    users: int,
+    managers: int,
+    invoices: int,
+    years: int = 3,
+    batch: int = 20_000,
+    tx_batches: int = 10,
+    seed: int = 42,
+    prefix: str = "GEN",
+    verbose: bool = True,
+) -> dict:
+    """Bulk-loads the data set; returns counts and timings."""
+    t0 = time.perf_counter()
+    rnd = random.Random(seed)
+    await migrations.upgrade(engine)
+
+    pwd_hash = hash_pwd(PASSWORD)  # bcrypt once, shared by every account
+    async with engine.begin() as conn:
+        first_user = (await conn.scalar(select(func.max(User.id)))) or 0
+        accounts = [
+            {"username": f"{prefix.lower()}-emp{first_user + i}",
+             "password_hash": pwd_hash, "role": RoleEnum.Employee}
+            for i in range(users)
+        ] + [
+            {"username": f"{prefix.lower()}-mgr{first_user + i}",
+             "password_hash": pwd_hash, "role": RoleEnum.Manager}
+            for i in range(managers)
+        ]
+        ids = []
+        if accounts:
+            # the id sequence may be ahead of max(id): use the ids the DB assigned
+            stmt = insert(User).returning(User.id, sort_by_parameter_order=True)
+            ids = (await conn.execute(stmt, accounts)).scalars().all()
+        first_invoice = ((await conn.scalar(select(func.max(Invoice.id)))) or 0) + 1
+
+    employees, manager_ids = ids[:users], ids[users:]
+    start = date.today().replace(month=1, day=1) - timedelta(days=365 * (years - 1))
+    rows = _invoice_rows(rnd, first_invoice, invoices, employees, manager_ids,
+                         start, 365 * years, prefix)
+
+    written = history = 0
+    while written < invoices:
+        # one transaction per `tx_batches` executemany calls
+        async with engine.begin() as conn:
+            for _ in range(tx_batches):
+                chunk = [next(rows) for _ in range(min(batch, invoices - written))]
+                if not chunk:
+                    break
+                hist = [h for _, h in chunk if h]
+                await conn.execute(Invoice.__table__.insert(), [inv for inv, _ in chunk])
+                if hist:
+                    await conn.execute(InvoiceHistory.__table__.insert(), hist)
+                written += len(chunk)
+                history += len(hist)
+        if verbose:
+            rate = written / (time.perf_counter() - t0)
+            print(f"· {written:,}/{invoices:,} invoices ({rate:,.0f}/s)", flush=True)
+
+    if engine.dialect.name == "postgresql" and written:
+        # explicit ids don't advance the serial sequence; without this the
+        # next upload would collide with the seeded rows
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql(
+                "SELECT setval(pg_get_serial_sequence('invoices', 'id'), "
+                "(SELECT max(id) FROM invoices))"
+            )
+
+    async with SessionLocal() as session:
+        await rollups.rebuild(session)
+        await session.commit()
+
+    return {
+        "users": users,
+        "managers": managers,
+        "invoices": written,
+        "history": history,
+        "seconds": round(time.perf_counter() - t0, 1),
+    }
+
+
+def write_csv_fixtures(out: Path, files: int, rows: int, seed: int = 7) -> list[Path]:
+    """CSV files for `/invoices/upload`, numbered so they never clash with the DB."""
+    rnd = random.Random(seed)
+    out.mkdir(parents=True, exist_ok=True)
+    start = date.today().replace(month=1, day=1)
+    paths = []
+    for f in range(files):
+        path = out / f"invoices_{f + 1:03d}.csv"
+        with path.open("w", newline="") as fh:
+            w = csv.writer(fh)
+            w.writerow(["invoice_number", "date", "amount", "description"])
+            for i in range(rows):
+                w.writerow([
+                    f"CSV{seed}-{f:03d}-{i:07d}",
+                    (start + timedelta(days=rnd.randrange(365))).isoformat(),
+                    f"{rnd.lognormvariate(4, 1) + 1:.2f}",
+                    rnd.choice(DESCRIPTIONS),
+                ])
+        paths.append(path)
+    return paths
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Generate synthetic users, invoices and history")
+    # None = not given: defaults apply unless only --csv-out was asked for
+    p.add_argument("--users", type=int, help="employees (default 1000)")
+    p.add_argument("--managers", type=int, help="(default 20)")
+    p.add_argument("--invoices", type=int, help="(default 100000)")
+    p.add_argument("--years", type=int, default=3, help="spread invoice dates over N years")
+    p.add_argument("--batch", type=int, default=20_000, help="rows per executemany")
+    p.add_argument("--tx-batches", type=int, default=10, help="executemany calls per transaction")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--prefix", default="GEN", help="invoice number / username prefix")
+    p.add_argument("--csv-out", type=Path, help="also write upload fixtures here")
+    p.add_argument("--csv-files", type=int, default=1)
+    p.add_argument("--csv-rows", type=int, default=60_000)
+    args = p.parse_args()
+    counts = {"users": 1000, "managers": 20, "invoices": 100_000}
+    fixtures_only = args.csv_out is not None and all(
+        getattr(args, name) is None for name in counts
+    )
+    for name, default in counts.items():
+        if getattr(args, name) is None:
+            setattr(args, name, 0 if fixtures_only else default)
+    return args
+
+
+async def main(args: argparse.Namespace) -> None:
+    stats = await generate(
+        args.users, args.managers, args.invoices, args.years,
+        args.batch, args.tx_batches, args.seed, args.prefix,
+    )
+    await engine.dispose()
+    print(f"✅  {stats}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.invoices or args.users or args.managers:
+        asyncio.run(main(args))
+    if args.csv_out:
+        for path in write_csv_fixtures(args.csv_out, args.csv_files, args.csv_rows):
+            print(f"· wrote {path}")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+scripts/migrate.py
+------------------
+
+Brings DATABASE_URL up to the schema this build expects:
+
+  $ python -m scripts.migrate                  # apply pending migrations
+  $ python -m scripts.migrate --status         # applied vs latest version
+  $ python -m scripts.migrate --sql postgresql [--from 2] > migrate.sql
+
+`--sql` prints the migrations as a SQL script without touching a database,
+for review or for running by hand.  Run this before starting (new) workers;
+the app itself only checks the version at startup.  Databases created with
+`create_all` before migrations existed are adopted as the baseline.
+"""
+
+import argparse
+import asyncio
+
+from app import migrations
+from app.database import engine
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        before = await migrations.current(engine)
+        if args.status:
+            print(f"schema version {before}, latest {migrations.HEAD}")
+            return
+        for m in await migrations.upgrade(engine, args.to):
+            print(f"· {m.version:04d} {m.description}")
+        print(f"✅  schema at version {await migrations.current(engine)}")
+    finally:
+        await engine.dispose()
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Apply or print schema migrations")
+    p.add_argument("--to", type=int, help="stop at this version (default: latest)")
+    p.add_argument("--status", action="store_true", help="show the applied version")
+    p.add_argument("--sql", choices=sorted(migrations.DIALECTS),
+                   help="print the SQL for this dialect instead of applying it")
+    p.add_argument("--from", dest="start", type=int, default=0,
+                   help="with --sql: version the target database is already at")
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.sql:
+        print(migrations.render_sql(args.sql, args.start, args.to), end="")
+    else:
+        asyncio.run(main(args))
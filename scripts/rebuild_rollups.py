@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+"""
+scripts/rebuild_rollups.py
+--------------------------
+
+Recompute the `monthly_spend` rollup behind `/reports/monthly` from the
+`invoices` table:
+
+  $ python -m scripts.rebuild_rollups
+
+Needed after backfills or bulk loads that bypass the API; the rollup is
+otherwise maintained incrementally by uploads and approve/reject.
+"""
+
+import asyncio
+
+from app import migrations
+from app.database import engine, SessionLocal
+from app.services import rollups
+
+
+async def main() -> None:
+    await migrations.upgrade(engine)
+
+    async with SessionLocal() as session:
+        await rollups.rebuild(session)
+        await session.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    print("✅  monthly_spend rebuilt.")
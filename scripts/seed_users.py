@@ -21,11 +21,12 @@ import argparse
 import asyncio
 from typing import Sequence
 
-from passlib.hash import bcrypt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import engine, Base, SessionLocal
+from app.auth import hash_pwd_async
+from app import migrations
+from app.database import engine, SessionLocal
 from app.models import User, RoleEnum
 
 
@@ -41,7 +42,7 @@ USER_DATA: Sequence[tuple[str, str, RoleEnum]] = (
 async def add_user(
     session: AsyncSession,
     username: str,
-    password: str,
+    password_hash: str,
     role: RoleEnum,
 ) -> None:
     exists = await session.scalar(select(User).where(User.username == username))
@@ -52,7 +53,7 @@ async def add_user(
     session.add(
         User(
             username=username,
-            password_hash=bcrypt.hash(password),
+            password_hash=password_hash,
             role=role,
         )
     )
@@ -61,14 +62,23 @@ async def add_user(
 
 
 async def seed(users: Sequence[tuple[str, str, RoleEnum]]) -> None:
-    # Ensure tables exist
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Ensure the schema is up to date
+    await migrations.upgrade(engine)
 
-    # Insert users
     async with SessionLocal() as session:
-        for username, password, role in users:
-            await add_user(session, username, password, role)
+        present = set(
+            await session.scalars(
+                select(User.username).where(User.username.in_([u for u, _, _ in users]))
+            )
+        )
+        # Hash the new accounts concurrently on the app's bcrypt pool
+        hashes = await asyncio.gather(
+            *(hash_pwd_async(pwd) for u, pwd, _ in users if u not in present)
+        )
+        new = iter(hashes)
+        for username, _, role in users:
+            password_hash = "" if username in present else next(new)
+            await add_user(session, username, password_hash, role)
 
 
 # --------------------------------------------------------------------------- #
@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+# Point the app at a throw-away SQLite file before anything imports it.
+os.environ["DATABASE_URL"] = (
+    f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='invoice-tests-')}/test.db"
+)
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from app import auth, dependencies, migrations  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.routers import reports  # noqa: E402
+from app.models import RoleEnum, User  # noqa: E402
+
+# Manual scripts that talk to a live server / ./invoice.db, not pytest tests.
+collect_ignore = ["test_add_users.py", "test_api_functions.py"]
+
+PASSWORD = "secret"
+_migrated = False  # the schema is built once, through the migrations
+_HASH = auth.hash_pwd(PASSWORD)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    global _migrated
+    if not _migrated:
+        await migrations.upgrade(engine)
+        _migrated = True
+    async with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
+    auth._user_cache.clear()
+    reports._responses.clear()
+    dependencies._limiter = None
+    async with SessionLocal() as session:
+        session.add_all(
+            [
+                User(username="alice", password_hash=_HASH, role=RoleEnum.Employee),
+                User(username="bob", password_hash=_HASH, role=RoleEnum.Manager),
+            ]
+        )
+        await session.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+    await engine.dispose()
+
+
+async def add_user(username: str, role: RoleEnum = RoleEnum.Employee) -> int:
+    async with SessionLocal() as session:
+        user = User(username=username, password_hash=_HASH, role=role)
+        session.add(user)
+        await session.commit()
+        return user.id
+
+
+async def login(client: httpx.AsyncClient, username: str) -> dict:
+    r = await client.post("/login", data={"username": username, "password": PASSWORD})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+async def upload(client: httpx.AsyncClient, headers: dict, rows: list[str]):
+    body = "invoice_number,date,amount,description\n" + "\n".join(rows) + "\n"
+    return await client.post(
+        "/invoices/upload",
+        headers=headers,
+        files={"file": ("invoices.csv", body, "text/csv")},
+    )
@@ -0,0 +1,655 @@
+import asyncio
+import csv
+import io
+import json
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, exc, func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import auth, database
+from app.database import SessionLocal, engine
+from app.models import InvoiceHistory, JobStatusEnum, MonthlySpend, RoleEnum, UploadJob, User
+
+from .conftest import add_user, login, upload
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_transition_is_race_free(client):
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    assert (await upload(client, emp, ["INV-1,2025-05-01,10.00,Taxi"])).status_code == 200
+
+    # open the pool's connections up front so the requests below overlap
+    await asyncio.gather(*(client.get("/invoices", headers=mgr) for _ in range(10)))
+
+    async def hit(i: int):
+        action = "approve" if i % 2 else "reject"
+        return await client.post(f"/invoices/1/{action}", headers=mgr, json={})
+
+    responses = await asyncio.gather(*(hit(i) for i in range(30)))
+    codes = sorted(r.status_code for r in responses)
+    assert codes == [200] + [409] * 29
+
+    async with SessionLocal() as db:
+        events = await db.scalar(
+            select(func.count()).select_from(InvoiceHistory).where(InvoiceHistory.invoice_id == 1)
+        )
+    assert events == 1
+
+
+async def test_transition_not_found(client):
+    mgr = await login(client, "bob")
+    r = await client.post("/invoices/42/approve", headers=mgr, json={})
+    assert r.status_code == 404
+
+
+async def test_bulk_transition(client):
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    await upload(client, emp, [
+        "INV-1,2025-05-01,10.00,Taxi",
+        "INV-2,2025-05-02,2.50,Bus",
+        "INV-3,2025-05-03,4.00,Lunch",
+    ])
+    await client.post("/invoices/3/reject", headers=mgr, json={})
+
+    body = {"ids": [1, 2, 2, 3, 42], "status": "Approved", "comment": "ok"}
+    assert (await client.post("/invoices/bulk-transition", headers=emp, json=body)).status_code == 403
+    r = await client.post("/invoices/bulk-transition", headers=mgr, json=body)
+    assert r.json()["results"] == [
+        {"id": 1, "outcome": "transitioned"},
+        {"id": 2, "outcome": "transitioned"},
+        {"id": 3, "outcome": "already_processed"},
+        {"id": 42, "outcome": "not_found"},
+    ]
+    r = await client.get("/invoices", headers=mgr)
+    assert [(inv["status"], inv["manager_comment"]) for inv in r.json()] == [
+        ("Approved", "ok"), ("Approved", "ok"), ("Rejected", None),
+    ]
+
+    async with SessionLocal() as db:
+        events = (await db.execute(
+            select(InvoiceHistory.invoice_id, func.count())
+            .group_by(InvoiceHistory.invoice_id)
+            .order_by(InvoiceHistory.invoice_id)
+        )).all()
+        spend = (await db.execute(
+            select(MonthlySpend.status, MonthlySpend.count, MonthlySpend.total_cents)
+            .where(MonthlySpend.count > 0)
+            .order_by(MonthlySpend.status)
+        )).all()
+    assert events == [(1, 1), (2, 1), (3, 1)]  # the duplicate id moved nothing twice
+    assert [(s.value, n, cents) for s, n, cents in spend] == [
+        ("Approved", 2, 1250), ("Rejected", 1, 400),
+    ]
+
+
+async def test_history(client):
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    await upload(client, emp, ["INV-1,2025-05-01,10.00,Taxi", "INV-2,2025-05-02,5.00,Bus"])
+    await client.post("/invoices/1/approve", headers=mgr, json={})
+
+    r = await client.get("/invoices/1/history", headers=emp)
+    assert [(e["actor"], e["action"]) for e in r.json()] == [("bob", "Approved")]
+    ts = r.json()[0]["ts"]
+    r = await client.get("/invoices/1/history", headers=emp, params={"since": ts})
+    assert r.json() == []
+    assert (await client.get("/invoices/2/history", headers=emp)).json() == []
+    assert (await client.get("/invoices/3/history", headers=emp)).status_code == 404
+
+    r = await client.get("/invoices/history", headers=mgr, params={"ids": [1, 2, 3]})
+    assert [(e["invoice_id"], e["action"]) for e in r.json()] == [(1, "Approved")]
+
+    # events sharing a timestamp page through the (ts, id) cursor exactly once
+    same = datetime(2025, 6, 1, 12, 0)
+    async with SessionLocal() as db:
+        db.add_all([
+            InvoiceHistory(invoice_id=2, ts=same, action=action, actor_id=2)
+            for action in ["Approved", "Rejected"] * 3
+        ])
+        await db.commit()
+    pages, params = [], {"limit": 4}
+    while True:
+        r = await client.get("/invoices/2/history", headers=emp, params=params)
+        pages.append([e["action"] for e in r.json()])
+        if "x-next-cursor" not in r.headers:
+            break
+        params["after"] = r.headers["x-next-cursor"]
+    assert pages == [["Approved", "Rejected"] * 2, ["Approved", "Rejected"]]
+    r = await client.get("/invoices/2/history", headers=emp, params={"after": "yesterday"})
+    assert r.status_code == 400
+
+
+async def test_list_pagination_and_filters(client):
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    await upload(client, emp, [
+        "INV-1,2025-01-10,1.00,A",
+        "INV-2,2025-02-10,2.50,B",
+        "INV-3,2025-03-10,10.00,C",
+        "INV-4,2025-04-10,10.01,D",
+        "INV-5,2025-05-10,99.99,E",
+    ])
+    carol = await add_user("carol")
+    other = await login(client, "carol")
+    await upload(client, other, ["INV-6,2025-03-15,5.00,F"])
+    await client.post("/invoices/3/approve", headers=mgr, json={})
+
+    async def ids(headers, **params) -> list[int]:
+        r = await client.get("/invoices", headers=headers, params=params)
+        assert r.status_code == 200, r.text
+        return [inv["id"] for inv in r.json()]
+
+    # following X-Next-Cursor walks every row exactly once, then stops
+    pages, params = [], {"limit": 4}
+    while True:
+        r = await client.get("/invoices", headers=mgr, params=params)
+        pages.append([inv["id"] for inv in r.json()])
+        if "x-next-cursor" not in r.headers:
+            break
+        params["after"] = r.headers["x-next-cursor"]
+    assert pages == [[1, 2, 3, 4], [5, 6]]
+    assert await ids(mgr, status="Pending", limit=2, after=2) == [4, 5]
+    assert (await client.get("/invoices", headers=mgr, params={"limit": 1001})).status_code == 422
+
+    assert await ids(mgr, status="Approved") == [3]
+    assert await ids(mgr, date_from="2025-02-10", date_to="2025-03-15") == [2, 3, 6]
+    assert await ids(mgr, min_amount="2.50", max_amount="10.00") == [2, 3, 6]
+    # bounds finer than a cent round inwards
+    assert await ids(mgr, min_amount="10.005") == [4, 5]
+    assert await ids(mgr, max_amount="10.009") == [1, 2, 3, 6]
+    assert await ids(mgr, uploaded_by=carol) == [6]
+    assert await ids(mgr, uploaded_by=carol, status="Approved") == []
+
+    # uploaded_by never widens an employee's scope
+    assert await ids(emp, uploaded_by=carol) == [1, 2, 3, 4, 5]
+    assert await ids(other, uploaded_by=1) == [6]
+    # a page holding exactly `limit` rows is the last one
+    r = await client.get("/invoices", headers=other, params={"limit": 1})
+    assert len(r.json()) == 1 and "x-next-cursor" not in r.headers
+
+
+async def test_search(client):
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    await upload(client, emp, [
+        "INV-2024-001,2025-05-01,10.00,Airport taxi",
+        "INV-2024-002,2025-05-02,5.00,Team lunch",
+        "ACME-77,2025-05-03,7.00,Taxi to client",
+    ])
+    search = lambda headers, **params: client.get(  # noqa: E731
+        "/invoices/search", headers=headers, params=params
+    )
+
+    r = await search(mgr, q="taxi")
+    assert {inv["invoice_number"] for inv in r.json()} == {"INV-2024-001", "ACME-77"}
+    r = await search(mgr, q="inv-2024", limit=1)
+    assert len(r.json()) == 1 and r.headers["x-next-cursor"] == "1"
+    r = await search(mgr, q="inv-2024", limit=1, offset=1)
+    assert len(r.json()) == 1 and "x-next-cursor" not in r.headers
+    assert [i["invoice_number"] for i in (await search(mgr, q="air TAX")).json()] == ["INV-2024-001"]
+    assert (await search(mgr, q='"acme*^(')).json()[0]["invoice_number"] == "ACME-77"
+    assert (await search(mgr, q="taxi", status="Approved")).json() == []
+    assert (await search(mgr, q="--")).status_code == 400
+
+    await client.post("/invoices/3/reject", headers=mgr, json={})
+    assert len((await search(mgr, q="taxi", status="Rejected")).json()) == 1
+    await add_user("carol")  # another employee sees none of alice's invoices
+    assert (await search(await login(client, "carol"), q="taxi")).json() == []
+
+
+async def test_amounts_are_exact(client):
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    rows = [f"INV-{i},2025-05-01,0.10,Coffee" for i in range(10)]
+    assert (await upload(client, emp, rows + ["INV-X,2025-05-02,720.39,Hotel"])).status_code == 200
+
+    r = await client.get("/reports/monthly", headers=mgr, params={"year": 2025})
+    assert r.json()[0]["total"] == 721.39
+    r = await client.get("/invoices", headers=mgr, params={"min_amount": "720.385"})
+    assert [(inv["invoice_number"], inv["amount"]) for inv in r.json()] == [("INV-X", 720.39)]
+
+    r = await upload(client, emp, ["INV-Y,2025-05-03,1.005,Rounding"])
+    assert r.json()["detail"][0]["error"] == "amount '1.005' has more than 2 decimal places"
+    # beyond Decimal's 28 digits the extra places would be rounded away unnoticed
+    r = await upload(client, emp, ["INV-Y,2025-05-03,1.000000000000000000000000000001,Tiny"])
+    assert r.json()["detail"][0]["error"].endswith("has more than 2 decimal places")
+
+    # out-of-range filters are clamped or rejected, never passed to the driver
+    r = await client.get("/invoices", headers=mgr, params={"min_amount": "1e30"})
+    assert r.json() == []
+    r = await client.get("/invoices", headers=mgr, params={"max_amount": "-1e30"})
+    assert r.json() == []
+    huge = 2**63
+    for path, params in [
+        ("/invoices", {"after": huge}),
+        ("/invoices", {"uploaded_by": huge}),
+        (f"/invoices/{huge}/history", {}),
+        (f"/invoices/upload-jobs/{huge}", {}),
+    ]:
+        assert (await client.get(path, headers=mgr, params=params)).status_code == 422, path
+    body = {"ids": [huge], "status": "Approved"}
+    assert (await client.post("/invoices/bulk-transition", headers=mgr, json=body)).status_code == 422
+
+
+async def test_upload_reports_every_bad_row(client):
+    emp = await login(client, "alice")
+    assert (await upload(client, emp, ["INV-1,2025-05-01,10.00,Taxi"])).status_code == 200
+    r = await upload(
+        client,
+        emp,
+        [
+            "INV-2,2025-05-01,12.50,Lunch",
+            "",  # blank lines are skipped but still numbered
+            "INV-3,2025-13-01,5.00,Bus",
+            "INV-1,2025-05-02,5.00,Again",
+            "INV-4,2025-05-03,-1,Refund",
+            "INV-2,2025-05-04,3.00,Copy",
+        ],
+    )
+    assert r.status_code == 400
+    assert [e["row"] for e in r.json()["detail"]] == [4, 5, 6, 7]
+    # nothing from a rejected file is kept
+    r = await client.get("/invoices", headers=emp)
+    assert [inv["invoice_number"] for inv in r.json()] == ["INV-1"]
+
+    async def upload_bytes(body: bytes):
+        return await client.post(
+            "/invoices/upload", headers=emp,
+            files={"file": ("invoices.csv", b"invoice_number,date,amount,description\n" + body)},
+        )
+
+    # bytes that aren't UTF-8 are an error of their row, not of the request
+    r = await upload_bytes(b"INV-5,2025-05-01,1.00,Caf\xe9\nINV-6,2025-05-01,x,Tea\n")
+    assert r.status_code == 400
+    assert r.json()["detail"] == [
+        {"row": 2, "error": "description is not valid UTF-8"},
+        {"row": 3, "error": "amount 'x' is not a number"},
+    ]
+    # so is anything the CSV reader itself gives up on
+    r = await upload_bytes(b"INV-5,2025-05-01,1.00,Tea\nINV-6,2025-05-01,1.00," + b"x" * 200_000 + b"\n")
+    assert r.status_code == 400
+    assert r.json()["detail"][0]["row"] == 3
+    assert r.json()["detail"][0]["error"].startswith("unreadable CSV: field larger than")
+
+
+async def test_upload_is_idempotent_and_resumable(client, monkeypatch):
+    from app.services import csv_parser, rollups
+
+    emp = await login(client, "alice")
+    rows = ["INV-1,2025-05-01,10.00,Taxi", "INV-2,2025-05-02,5.00,Bus"]
+    r = await upload(client, emp, rows)
+    assert r.json() == {"inserted": 2, "batch_id": 1}
+    # a retry replays the result instead of failing on duplicates
+    r = await upload(client, emp, rows)
+    assert r.json() == {"inserted": 2, "batch_id": 1}
+    assert r.headers["idempotent-replayed"] == "true"
+
+    keyed = {**emp, "Idempotency-Key": "k-1"}
+    assert (await upload(client, keyed, ["INV-3,2025-05-03,1.00,Tea"])).json()["batch_id"] == 2
+    r = await upload(client, keyed, ["INV-4,2025-05-03,1.00,Tea"])
+    assert r.status_code == 422
+
+    # the connection drops after the first of three chunks was committed ...
+    apply, calls = rollups.apply, []
+
+    async def flaky_apply(db, deltas):
+        calls.append(1)
+        if calls == [1, 1]:
+            raise ConnectionError("lost the database")
+        await apply(db, deltas)
+
+    monkeypatch.setattr(csv_parser, "CHUNK_SIZE", 1)
+    monkeypatch.setattr(rollups, "apply", flaky_apply)
+    big = ["INV-5,2025-06-01,1.00,A", "", "INV-6,2025-06-02,2.00,B", "INV-7,2025-06-03,3.00,C"]
+    with pytest.raises(ConnectionError):
+        await upload(client, emp, big)
+    r = await client.get("/invoices", headers=emp, params={"batch_id": 3})
+    assert [inv["invoice_number"] for inv in r.json()] == ["INV-5"]
+
+    # ... and the retry carries on from the second record, past the blank line
+    r = await upload(client, emp, big)
+    assert r.json() == {"inserted": 3, "batch_id": 3} and len(calls) == 4
+    r = await client.get("/invoices", headers=emp, params={"batch_id": 3})
+    assert [inv["invoice_number"] for inv in r.json()] == ["INV-5", "INV-6", "INV-7"]
+
+
+async def test_upload_jobs(client, monkeypatch, tmp_path):
+    from app.services import csv_parser, ingest_jobs
+
+    monkeypatch.setattr(ingest_jobs, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(csv_parser, "CHUNK_SIZE", 2)
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    await upload(client, emp, ["INV-1,2025-05-01,10.00,Taxi"])
+
+    async def run_job(body: str) -> int:
+        r = await client.post(
+            "/invoices/upload-jobs",
+            headers=emp,
+            files={"file": ("big.csv", body, "text/csv")},
+        )
+        assert r.status_code == 202 and r.json()["status"] == "Queued"
+        await asyncio.gather(*ingest_jobs._tasks)
+        return r.json()["id"]
+
+    job_id = await run_job(
+        "invoice_number,date,amount,description\n"
+        "INV-2,2025-05-02,5.00,Bus\n"
+        "INV-3,2025-13-01,1.00,Bad date\n"
+        "INV-1,2025-05-03,1.00,Already uploaded\n"
+        "\n"
+        "INV-4,2025-06-01,2.50,Tea\n"
+        "INV-2,2025-06-02,1.00,Repeated\n"
+    )
+    job = (await client.get(f"/invoices/upload-jobs/{job_id}", headers=emp)).json()
+    assert job["status"] == "Completed" and job["size_bytes"] > 0
+    # bad and duplicate rows are skipped, not fatal, and keep their file lines
+    assert (job["rows_processed"], job["rows_inserted"], job["rows_rejected"]) == (5, 2, 3)
+    assert [e["row"] for e in job["errors"]] == [3, 4, 7]
+    assert list(tmp_path.iterdir()) == []  # the spooled file is removed
+    r = await client.get("/invoices", headers=emp)
+    assert [inv["invoice_number"] for inv in r.json()] == ["INV-1", "INV-2", "INV-4"]
+
+    # the job's inserts reach the rollup like a synchronous upload's
+    async with SessionLocal() as db:
+        spend = (await db.execute(
+            select(MonthlySpend.month, MonthlySpend.count, MonthlySpend.total_cents)
+            .order_by(MonthlySpend.month)
+        )).all()
+    assert spend == [(5, 2, 1500), (6, 1, 250)]
+
+    failed = await run_job("number,amount\nINV-9,1.00\n")
+    job = (await client.get(f"/invoices/upload-jobs/{failed}", headers=emp)).json()
+    assert job["status"] == "Failed" and job["detail"] and job["rows_inserted"] == 0
+
+    # jobs are private to their uploader; managers see them all
+    await add_user("carol")
+    other = await login(client, "carol")
+    assert (await client.get(f"/invoices/upload-jobs/{job_id}", headers=other)).status_code == 404
+    assert (await client.get(f"/invoices/upload-jobs/{job_id}", headers=mgr)).status_code == 200
+    assert (await client.get("/invoices/upload-jobs/999", headers=mgr)).status_code == 404
+
+
+async def test_orphaned_upload_jobs_fail(client):
+    from app.main import app
+
+    mgr = await login(client, "bob")
+    now, old = datetime.utcnow(), datetime.utcnow() - timedelta(hours=1)
+    async with SessionLocal() as db:  # as left behind by a worker that died
+        db.add_all([
+            UploadJob(uploaded_by=1, status=JobStatusEnum.Running, errors=[], size_bytes=1,
+                      created_at=old, heartbeat_at=old),
+            UploadJob(uploaded_by=1, status=JobStatusEnum.Queued, errors=[], size_bytes=1,
+                      created_at=old),
+            UploadJob(uploaded_by=1, status=JobStatusEnum.Running, errors=[], size_bytes=1,
+                      created_at=old, heartbeat_at=now),
+        ])
+        await db.commit()
+    status = lambda i: client.get(f"/invoices/upload-jobs/{i}", headers=mgr)  # noqa: E731
+
+    async with app.router.lifespan_context(app):  # worker startup sweeps them
+        pass
+    jobs = [(await status(i)).json() for i in (1, 2, 3)]
+    assert [j["status"] for j in jobs] == ["Failed", "Failed", "Running"]
+    assert jobs[0]["detail"].startswith("Interrupted") and jobs[0]["finished_at"]
+
+    # a job orphaned after startup is failed when it is polled
+    async with SessionLocal() as db:
+        (await db.get(UploadJob, 3)).heartbeat_at = old
+        await db.commit()
+    assert (await status(3)).json()["status"] == "Failed"
+
+
+async def test_exports(client):
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    await upload(client, emp, ['INV-1,2025-05-01,10.00,"Taxi, late"', "INV-2,2025-06-02,2.50,Bus"])
+    carol = await add_user("carol")
+    await upload(client, await login(client, "carol"), ["INV-3,2025-05-03,4.00,Lunch"])
+    await client.post("/invoices/1/approve", headers=mgr, json={"comment": "fine"})
+
+    r = await client.get("/invoices/export", headers=mgr)
+    assert r.headers["content-type"].startswith("text/csv")
+    assert r.headers["content-disposition"] == 'attachment; filename="invoices.csv"'
+    assert list(csv.reader(io.StringIO(r.text))) == [
+        ["id", "invoice_number", "date", "amount", "description", "status",
+         "manager_comment", "uploaded_by"],
+        ["1", "INV-1", "2025-05-01", "10.0", "Taxi, late", "Approved", "fine", "1"],
+        ["2", "INV-2", "2025-06-02", "2.5", "Bus", "Pending", "", "1"],
+        ["3", "INV-3", "2025-05-03", "4.0", "Lunch", "Pending", "", str(carol)],
+    ]
+
+    r = await client.get("/invoices/export", headers=mgr,
+                         params={"format": "ndjson", "status": "Pending"})
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in r.text.splitlines()] == [
+        {"id": 2, "invoice_number": "INV-2", "date": "2025-06-02", "amount": 2.5,
+         "description": "Bus", "status": "Pending", "manager_comment": None,
+         "uploaded_by": 1},
+        {"id": 3, "invoice_number": "INV-3", "date": "2025-05-03", "amount": 4.0,
+         "description": "Lunch", "status": "Pending", "manager_comment": None,
+         "uploaded_by": carol},
+    ]
+    # employees export their own invoices only, whatever they filter on
+    r = await client.get("/invoices/export", headers=emp,
+                         params={"format": "ndjson", "uploaded_by": carol})
+    assert [json.loads(line)["id"] for line in r.text.splitlines()] == [1, 2]
+
+    monthly = lambda h, **params: client.get(  # noqa: E731
+        "/reports/monthly/export", headers=h, params={"year": 2025, **params}
+    )
+    assert (await monthly(emp)).status_code == 403
+    r = await monthly(mgr)
+    assert r.text.splitlines() == [
+        "employee,month,total", "alice,2025-05,10.0", "alice,2025-06,2.5", "carol,2025-05,4.0",
+    ]
+    r = await monthly(mgr, format="ndjson")
+    assert json.loads(r.text.splitlines()[0]) == {"employee": "alice", "month": "2025-05", "total": 10.0}
+    assert (await monthly(mgr, format="xml")).status_code == 422
+
+
+async def test_identity_cache(client):
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    report = lambda h: client.get("/reports/monthly", headers=h, params={"year": 2025})  # noqa: E731
+    statements: list[str] = []
+
+    def on_execute(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    # a warm cache lets the role guard answer without touching the database
+    event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        assert (await report(emp)).status_code == 403
+        assert statements == []
+        auth._user_cache.clear()
+        assert (await report(emp)).status_code == 403
+        assert any("FROM users" in sql for sql in statements)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+
+    # ORM changes invalidate the cached identity straight away
+    assert (await report(mgr)).status_code == 200
+    async with SessionLocal() as db:
+        (await db.get(User, 2)).role = RoleEnum.Employee
+        await db.commit()
+    assert (await report(mgr)).status_code == 403
+
+    assert (await client.get("/invoices", headers=emp)).status_code == 200
+    async with SessionLocal() as db:
+        await db.delete(await db.get(User, 1))
+        await db.commit()
+    assert (await client.get("/invoices", headers=emp)).status_code == 401
+
+
+async def test_monthly_report_etag(client):
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    await upload(client, emp, ["INV-1,2025-05-01,10.00,Taxi"])
+
+    r = await client.get("/reports/monthly", headers=mgr, params={"year": 2025})
+    assert r.json() == [{"employee": "alice", "month": "2025-05", "total": 10.0}]
+    etag = r.headers["etag"]
+    cached = {**mgr, "If-None-Match": etag}
+    r = await client.get("/reports/monthly", headers=cached, params={"year": 2025})
+    assert r.status_code == 304
+    r = await client.get("/reports/monthly", headers=cached, params={"year": 2024})
+    assert r.status_code == 200 and r.json() == []
+
+    # approve/reject and uploads invalidate
+    await client.post("/invoices/1/approve", headers=mgr, json={})
+    r = await client.get("/reports/monthly", headers=cached, params={"year": 2025})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+    cached["If-None-Match"] = r.headers["etag"]
+    await upload(client, emp, ["INV-2,2025-05-02,5.00,Bus"])
+    r = await client.get("/reports/monthly", headers=cached, params={"year": 2025})
+    assert r.status_code == 200 and r.json()[0]["total"] == 15.0
+
+
+async def test_spend_report(client):
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    await upload(client, emp, [
+        "INV-1,2025-01-15,10.00,Taxi",
+        "INV-2,2025-03-31,2.50,Bus",
+        "INV-3,2025-04-01,4.00,Lunch",
+        "INV-4,2025-06-20,1.25,Coffee",
+    ])
+    await client.post("/invoices/3/approve", headers=mgr, json={})
+    spend = lambda **params: client.get("/reports/spend", headers=mgr, params=params)  # noqa: E731
+
+    r = await spend(group_by=["quarter", "status"], date_from="2025-01-01", date_to="2025-06-30")
+    expected = [
+        {"quarter": "2025-Q1", "status": "Pending", "count": 2, "total": 12.5},
+        {"quarter": "2025-Q2", "status": "Approved", "count": 1, "total": 4.0},
+        {"quarter": "2025-Q2", "status": "Pending", "count": 1, "total": 1.25},
+    ]
+    assert r.json() == expected  # whole months: from the rollup
+    # a day-level range is answered from invoices with the same result shape
+    r = await spend(group_by=["quarter", "status"], date_from="2025-01-02", date_to="2025-06-29")
+    assert r.json() == expected
+    r = await spend(date_from="2025-03-31", date_to="2025-04-01", status="Pending")
+    assert r.json() == [{"employee": "alice", "month": "2025-03", "count": 1, "total": 2.5}]
+    r = await spend(date_from="0001-01-01", date_to="9999-12-31", status="Approved")
+    assert r.json() == [{"employee": "alice", "month": "2025-04", "count": 1, "total": 4.0}]
+    assert (await spend(date_from="2025-02-01", date_to="2025-01-01")).status_code == 400
+    assert (await spend(group_by="year")).status_code == 422
+
+
+def test_rate_limiter_backends(tmp_path):
+    from app.dependencies import MemoryBackend, SQLiteBackend
+
+    for backend in (MemoryBackend(5, 60), SQLiteBackend(5, 60, str(tmp_path / "rl.db"))):
+        t = 600.0  # start of a window
+        assert all(backend.hit("1.2.3.4", t + i) for i in range(5))
+        assert not backend.hit("1.2.3.4", t + 10)
+        assert backend.hit("5.6.7.8", t + 10)
+        # half-way through the next window half of the old attempts, rounded
+        # up, still count
+        assert all(backend.hit("1.2.3.4", t + s) for s in (90, 91))
+        assert not backend.hit("1.2.3.4", t + 92)
+        # attempts just before a boundary aren't under-counted after it
+        assert [backend.hit("9.9.9.9", 659.0 + 0.3 * i) for i in range(6)] == [True] * 5 + [False]
+        # two windows later the key is forgotten
+        assert backend.hit("1.2.3.4", t + 250)
+
+    mem = MemoryBackend(5, 60)
+    for i in range(1000):
+        mem.hit(f"10.0.{i // 256}.{i % 256}", 600.0)
+    mem.hit("1.1.1.1", 800.0)  # next sweep drops every key idle for a window
+    assert len(mem) == 1
+
+
+async def test_password_hashing_is_offloaded(client, monkeypatch):
+    threads = []
+    verify = auth.verify_pwd
+
+    def spy(pwd, hashed):
+        threads.append(threading.current_thread().name)
+        return verify(pwd, hashed)
+
+    monkeypatch.setattr(auth, "verify_pwd", spy)
+    monkeypatch.setattr(auth, "HASH_WORKERS", 2)
+    monkeypatch.setattr(auth, "_hash_pool", None)
+    await asyncio.gather(*(login(client, name) for name in ["alice", "bob"] * 2))
+    pool = auth._hash_pool
+    try:
+        assert pool._max_workers == 2
+        assert len(threads) == 4 and all(t.startswith("pwd-hash") for t in threads)
+    finally:
+        pool.shutdown()
+
+    # PASSWORD_HASH_WORKERS=0 hashes inline, on the event loop's thread
+    threads.clear()
+    monkeypatch.setattr(auth, "HASH_WORKERS", 0)
+    await login(client, "alice")
+    assert threads == [threading.current_thread().name]
+
+
+async def test_login_rate_limited(client, monkeypatch):
+    from app import dependencies
+
+    monkeypatch.setattr(dependencies, "_clock", lambda: 600.0)
+    for _ in range(5):
+        await login(client, "alice")
+    r = await client.post("/login", data={"username": "alice", "password": "x"})
+    assert r.status_code == 429
+    # the budget is per username, not shared by everyone behind the same address
+    await login(client, "bob")
+
+
+async def test_metrics_exposition(client):
+    emp = await login(client, "alice")
+    await upload(client, emp, ["INV-1,2025-05-01,10.00,Taxi", "INV-2,2025-05-02,5.00,Bus"])
+    text = (await client.get("/metrics")).text
+    assert 'http_request_queries_count{method="POST",route="/invoices/upload"}' in text
+    rows = next(l for l in text.splitlines() if l.startswith("invoice_ingest_rows_total"))
+    assert int(rows.split()[1]) >= 2
+
+
+async def test_pool_metrics(client):
+    await client.get("/invoices", headers=await login(client, "alice"))
+    stats = (await client.get("/metrics/pool")).json()
+    assert stats.keys() == {
+        "pool", "size", "checked_in", "checked_out", "overflow",
+        "checkouts", "timeouts", "wait_seconds_total", "wait_seconds_max",
+    }
+    assert stats["pool"] == "TimedQueuePool"
+    assert stats["checkouts"] >= 2 and stats["checked_out"] == 0
+
+
+async def test_timed_pool_counts_waits_and_timeouts(monkeypatch, tmp_path):
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(database, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(database, "DB_POOL_TIMEOUT", 0.05)
+    url = f"sqlite+aiosqlite:///{tmp_path}/pool.db"
+    eng = create_async_engine(url, **database.engine_options(url))
+    try:
+        async with eng.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with eng.connect():
+                    pass
+        pool = eng.pool
+        assert (pool.checkouts, pool.timeouts) == (2, 1)
+        assert pool.wait_max >= 0.05 and pool.wait_total >= pool.wait_max
+    finally:
+        await eng.dispose()
+
+
+def test_engine_options(monkeypatch):
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(database, "DB_STATEMENT_CACHE_SIZE", 0)
+    plain = {"echo": False, "future": True}
+    # in-memory SQLite keeps SQLAlchemy's default single-connection pool
+    assert database.engine_options("sqlite+aiosqlite://") == plain
+    assert database.engine_options("sqlite+aiosqlite:///:memory:") == plain
+
+    pooled = {
+        **plain,
+        "poolclass": database.TimedQueuePool,
+        "pool_size": 7,
+        "max_overflow": database.DB_MAX_OVERFLOW,
+        "pool_timeout": database.DB_POOL_TIMEOUT,
+        "pool_recycle": database.DB_POOL_RECYCLE,
+        "pool_pre_ping": database.DB_POOL_PRE_PING,
+    }
+    assert database.engine_options("sqlite+aiosqlite:///./invoice.db") == pooled
+    assert database.engine_options("postgresql+asyncpg://u:p@db/invoices") == {
+        **pooled, "connect_args": {"prepared_statement_cache_size": 0},
+    }
+
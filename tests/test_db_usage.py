@@ -0,0 +1,86 @@
+"""
+Pins the database work each endpoint does per request: pool checkouts and
+SQL statements.  One request = one session = at most one connection, and
+requests rejected from the token alone never touch the pool.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import auth
+from app.database import engine
+
+from .conftest import login, upload
+
+pytestmark = pytest.mark.anyio
+
+
+@contextmanager
+def db_usage():
+    used = Counter()
+
+    def on_checkout(*_):
+        used["checkouts"] += 1
+
+    def on_execute(*_):
+        used["statements"] += 1
+
+    event.listen(engine.sync_engine, "checkout", on_checkout)
+    event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        yield used
+    finally:
+        event.remove(engine.sync_engine, "checkout", on_checkout)
+        event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+
+
+async def test_db_work_per_request(client):
+    emp, mgr = await login(client, "alice"), await login(client, "bob")
+    await upload(client, emp, ["INV-1,2025-05-01,10.00,Taxi", "INV-2,2025-05-02,5.00,Bus"])
+    await client.get("/reports/monthly", headers=mgr, params={"year": 2025})
+
+    # name -> (request, (pool checkouts, SQL statements))
+    calls = {
+        "list": (lambda: client.get("/invoices", headers=emp), (1, 1)),
+        "bad token": (
+            lambda: client.get("/invoices", headers={"Authorization": "Bearer x"}), (0, 0)
+        ),
+        # UPDATE .. RETURNING, history INSERT, rollup upsert, version bump
+        "approve": (lambda: client.post("/invoices/1/approve", headers=mgr, json={}), (1, 4)),
+        "approve again": (
+            lambda: client.post("/invoices/1/approve", headers=mgr, json={}), (1, 2)
+        ),
+        "history": (lambda: client.get("/invoices/1/history", headers=mgr), (1, 1)),
+        "search": (
+            lambda: client.get("/invoices/search", headers=mgr, params={"q": "taxi"}), (1, 1)
+        ),
+        # data version + the rollup query (the approve invalidated the cache) ...
+        "report": (
+            lambda: client.get("/reports/monthly", headers=mgr, params={"year": 2025}), (1, 2)
+        ),
+        # ... then the version alone
+        "report, cached": (
+            lambda: client.get("/reports/monthly", headers=mgr, params={"year": 2025}), (1, 1)
+        ),
+        # batch lookup, duplicate check, batch INSERT + progress UPDATE,
+        # invoice INSERT, rollup upsert, version bump
+        "upload": (lambda: upload(client, emp, ["INV-3,2025-05-03,1.00,Tea"]), (1, 7)),
+        "upload, replayed": (lambda: upload(client, emp, ["INV-3,2025-05-03,1.00,Tea"]), (1, 1)),
+        "login": (
+            lambda: client.post("/login", data={"username": "bob", "password": "secret"}),
+            (1, 1),
+        ),
+    }
+    for name, (call, expected) in calls.items():
+        with db_usage() as used:
+            await call()
+        assert (used["checkouts"], used["statements"]) == expected, name
+
+    # without a cached identity the users lookup shares the route's session
+    auth._user_cache.clear()
+    with db_usage() as used:
+        await client.get("/invoices", headers=emp)
+    assert (used["checkouts"], used["statements"]) == (1, 2)
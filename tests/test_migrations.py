@@ -0,0 +1,111 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import migrations
+from app.database import Base
+from app.migrations import v0001_baseline
+
+
+def _schema(conn) -> dict:
+    insp = inspect(conn)
+    return {
+        t: (
+            {c["name"]: c["nullable"] for c in insp.get_columns(t)},
+            {ix["name"] for ix in insp.get_indexes(t)},
+        )
+        for t in insp.get_table_names()
+        # the search index (FTS5 table + shadow tables) has no model
+        if t != migrations.VERSION_TABLE and not t.startswith("invoices_fts")
+    }
+
+
+def _models() -> dict:
+    return {
+        t.name: (
+            {c.name: c.nullable for c in t.columns},
+            {ix.name for ix in t.indexes},
+        )
+        for t in Base.metadata.sorted_tables
+    }
+
+
+@pytest.mark.anyio
+async def test_migrations_build_the_models_schema(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/m.db")
+    assert len(await migrations.upgrade(engine)) == migrations.HEAD
+    assert await migrations.upgrade(engine) == []
+    async with engine.connect() as conn:
+        assert await conn.run_sync(_schema) == _models()
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_legacy_database_is_adopted(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/legacy.db")
+    async with engine.begin() as conn:  # what create_all used to build
+        await conn.run_sync(v0001_baseline.meta.create_all)
+        await conn.execute(text(
+            "INSERT INTO users VALUES (1, 'alice', 'x', 'Employee');"
+        ))
+        await conn.execute(text(
+            "INSERT INTO invoices (invoice_number, date, amount, status, uploaded_by) VALUES"
+            " ('A', '2025-05-01', 0.1, 'Pending', 1), ('B', '2025-05-02', 720.39, 'Pending', 1)"
+        ))
+    with pytest.raises(RuntimeError):
+        await migrations.check(engine)
+
+    await migrations.upgrade(engine)
+    await migrations.check(engine)
+    async with engine.connect() as conn:
+        cents = (await conn.execute(text("SELECT amount_cents FROM invoices ORDER BY id"))).scalars()
+        assert list(cents) == [10, 72039]
+        total = await conn.scalar(text("SELECT total_cents FROM monthly_spend"))
+        assert total == 72049
+        assert await conn.run_sync(_schema) == _models()
+    await engine.dispose()
+
+
+def test_offline_sql(tmp_path):
+    script = migrations.render_sql("sqlite")
+    db = sqlite3.connect(tmp_path / "offline.db")
+    db.executescript(script)
+    assert db.execute("SELECT max(version) FROM schema_version").fetchone() == (migrations.HEAD,)
+
+    lines = migrations.render_sql("postgresql", start=1).splitlines()
+    concurrent = [i for i, line in enumerate(lines) if "CONCURRENTLY" in line]
+    assert concurrent
+    for i in concurrent:  # never inside BEGIN ... COMMIT
+        opened = max((j for j in range(i) if lines[j] in ("BEGIN;", "COMMIT;")), default=None)
+        assert opened is None or lines[opened] == "COMMIT;"
+
+
+@pytest.mark.anyio
+async def test_non_transactional_steps_are_recorded(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/m.db")
+    await migrations.upgrade(engine)
+
+    # what create_index() emits for PostgreSQL, with SQLite's syntax
+    extra = migrations.Migration(migrations.HEAD + 1, SimpleNamespace(
+        DESCRIPTION="autocommit index",
+        steps=lambda dialect: [
+            migrations.Step(
+                "CREATE INDEX IF NOT EXISTS ix_t ON invoices (description)",
+                transactional=False,
+            ),
+            migrations.Step("CREATE INDEX IF NOT EXISTS ix_t2 ON invoices (status)"),
+        ],
+    ))
+    applied = migrations.load() + [extra]
+    monkeypatch.setattr(migrations, "load", lambda: applied)
+
+    assert await migrations.upgrade(engine, extra.version) == [extra]
+    assert await migrations.upgrade(engine, extra.version) == []
+    async with engine.connect() as conn:
+        assert await conn.run_sync(migrations._current) == extra.version
+        names = await conn.run_sync(lambda c: {ix["name"] for ix in inspect(c).get_indexes("invoices")})
+        assert {"ix_t", "ix_t2"} <= names
+    await engine.dispose()
@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import migrations
+
+BUDGET = float(os.getenv("STARTUP_BUDGET_SECONDS", "3"))
+LAZY = ("jose", "passlib", "app.services.csv_parser", "app.migrations.v0001_baseline")
+
+# A cold worker: import the app and run its lifespan startup, nothing else.
+_BOOT = f"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        pass
+
+asyncio.run(boot())
+print(json.dumps({{
+    "import": imported - t0,
+    "total": time.perf_counter() - t0,
+    "loaded": [m for m in {LAZY!r} if m in sys.modules],
+}}))
+"""
+
+
+@pytest.mark.anyio
+async def test_cold_start_within_budget(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path}/boot.db"
+    engine = create_async_engine(url)
+    await migrations.upgrade(engine)
+    await engine.dispose()
+
+    env = {**os.environ, "DATABASE_URL": url, "STARTUP_PROFILE": "1"}
+    proc = subprocess.run(
+        [sys.executable, "-c", _BOOT], env=env, capture_output=True, text=True,
+        cwd=Path(__file__).resolve().parents[1], timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    boot = json.loads(proc.stdout)
+    assert boot["loaded"] == []  # crypto, CSV parsing and migration bodies stay lazy
+    assert "startup profile" in proc.stderr and "migrations.check" in proc.stderr
+    assert boot["total"] < BUDGET, proc.stderr